@@ -0,0 +1,81 @@
+"""Measure the startup cost of importing streamlit_vector_db.
+
+Each scenario runs in a fresh interpreter so nothing is already imported:
+
+- eager: the pre-lazy behaviour, importing sentence_transformers, chromadb and
+  streamlit and constructing the model as the module used to do at import time
+- lazy import: `import streamlit_vector_db` as it is now
+- first use: the lazy import followed by get_model(), i.e. where the model
+  cost is paid now
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "eager": (
+        "import chromadb, streamlit; "
+        "from sentence_transformers import SentenceTransformer; "
+        "import streamlit_vector_db; "
+        "SentenceTransformer(streamlit_vector_db.MODEL_NAME)"
+    ),
+    "lazy import": "import streamlit_vector_db",
+    "first use": "import streamlit_vector_db; streamlit_vector_db.get_model()",
+}
+
+TIMER = (
+    "import time; start = time.perf_counter(); "
+    "{code}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_scenario(code, repeat):
+    """Wall time in seconds of each fresh-interpreter run of code."""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            capture_output=True, text=True, cwd=REPO_ROOT
+        )
+        if result.returncode != 0:
+            # A missing optional dependency makes the scenario unmeasurable here
+            return None, result.stderr.strip().splitlines()[-1]
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreter runs per scenario")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        timings, error = time_scenario(code, args.repeat)
+        if timings is None:
+            results[name] = {"error": error}
+        else:
+            results[name] = {"median_s": statistics.median(timings), "min_s": min(timings), "runs": len(timings)}
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:12s}  unavailable: {result['error']}")
+        else:
+            print(f"{name:12s}  median {result['median_s'] * 1000:8.1f} ms  min {result['min_s'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
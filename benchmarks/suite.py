@@ -0,0 +1,261 @@
+"""Benchmark the matchers, the embedding path and retrieval over scaled datasets.
+
+Datasets are built with generate_synth_data.generate_scale at every size in
+--sizes. Embeddings come from a deterministic hashing stand-in model
+(installed with set_model), so the numbers measure this code rather than
+the SentenceTransformer, and no model download is needed. Retrieval runs on
+an in-memory ChromaDB collection when chromadb is installed, otherwise on
+the NumPy index.
+
+Every benchmark reports throughput (items per second), p50/p99 latency of
+one call (of one user for the single-user benchmarks) and the peak memory
+traced during one extra run. Results are written as JSON; --compare flags
+benchmarks that got slower than a stored baseline by more than --threshold
+and exits with status 1 if any did.
+
+Usage:
+    python benchmarks/suite.py --sizes 1000 10000 --output bench.json
+    python benchmarks/suite.py --sizes 1000 10000 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import streamlit_vector_db as vector_db
+from generate_synth_data.generate_scale import iter_content, iter_users, write_json_array
+from helper_functions.helper_functions import match_country_content, match_country_and_content
+from helper_functions.vector_index import NumpyVectorIndex
+
+EMBEDDING_DIMENSION = 384
+
+# Users per timed call of the single-user benchmarks
+SINGLE_USER_SAMPLE = 200
+
+
+class HashingModel:
+    """Deterministic stand-in for the SentenceTransformer: hashed bag of words, normalized."""
+
+    def __init__(self, dimension=EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def encode(self, texts):
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.encode('utf-8')) % self.dimension] += 1
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return embeddings / norms
+
+
+class NumpyCollection:
+    """Collection with add() and query() over NumpyVectorIndex, used when chromadb is missing."""
+
+    def __init__(self):
+        self.ids, self.documents, self.embeddings, self.metadatas = [], [], [], []
+        self.index = None
+
+    def add(self, ids, documents, embeddings, metadatas):
+        self.ids += ids
+        self.documents += documents
+        self.embeddings += embeddings
+        self.metadatas += metadatas
+        self.index = None
+
+    def query(self, **kwargs):
+        if self.index is None:
+            self.index = NumpyVectorIndex(self.ids, self.documents, self.embeddings, self.metadatas)
+        return self.index.query(**kwargs)
+
+
+def new_collection():
+    """Empty collection of the available backend."""
+    try:
+        import chromadb
+    except ImportError:
+        return NumpyCollection()
+    client = chromadb.EphemeralClient()
+    name = f"bench_{time.perf_counter_ns()}"
+    return client.create_collection(name)
+
+
+def backend_name():
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        return "numpy"
+    return "chroma"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(run, items, repeat, setup=None):
+    """Time repeat calls of run(state) and trace the peak memory of one more call.
+
+    setup() builds a fresh state for every call outside the timed region;
+    items is the number of items one call processes. When run returns a list
+    of per-item latencies (single-user benchmarks), p50/p99 are taken over
+    those instead of over whole calls.
+    """
+    durations = []
+    latencies = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        gc.collect()
+        started = time.perf_counter()
+        item_latencies = run(state)
+        durations.append(time.perf_counter() - started)
+        latencies.extend(item_latencies if isinstance(item_latencies, list) else durations[-1:])
+
+    state = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(durations)
+    return {
+        "items": items,
+        "runs": repeat,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput_per_s": items * repeat / total if total else None,
+        "peak_mb": peak / 2 ** 20
+    }
+
+
+def run_suite(size, repeat, work_dir):
+    """Run every benchmark on size content items and size / 10 users."""
+    content = list(iter_content(size))
+    users = list(iter_users(max(size // 10, 1)))
+    users_path = os.path.join(work_dir, f"users_{size}.json")
+    write_json_array(users, users_path)
+    sample = users[:SINGLE_USER_SAMPLE]
+
+    vector_db.set_model(HashingModel())
+    content_ids, content_full_texts, content_embeddings, metadata = vector_db.prepare_content(content)
+    collection = new_collection()
+    vector_db.add_content_to_collection(collection, content_ids, content_full_texts, content_embeddings, metadata)
+    metadata_by_id = vector_db.index_metadata(metadata)
+    recommendations = [vector_db.match_user_to_content(collection, user['name'], user['interests'], 10) for user in sample]
+
+    def clear_interest_cache():
+        vector_db.interest_embedding_cache.clear()
+
+    def match_sample(_):
+        latencies = []
+        for user in sample:
+            started = time.perf_counter()
+            vector_db.match_user_to_content(collection, user['name'], user['interests'], 10)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    def filter_sample(_):
+        latencies = []
+        for user, user_recommendations in zip(sample, recommendations):
+            types = [interest['type'] for interest in user['interests']]
+            started = time.perf_counter()
+            vector_db.filter_recommendations(user_recommendations, user['interests'], types, metadata_by_id)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    benchmarks = {
+        "match_country_content": (lambda _: match_country_content(users, content), len(users), None),
+        "match_country_and_content": (lambda _: match_country_and_content(users, content), len(users), None),
+        "prepare_content": (lambda _: vector_db.prepare_content(content), len(content), None),
+        "add_content_to_collection": (
+            lambda collection: vector_db.add_content_to_collection(collection, content_ids, content_full_texts, content_embeddings, metadata),
+            len(content), new_collection
+        ),
+        # Cold interest cache: every distinct interest value is encoded once per run
+        "match_user_to_content": (match_sample, len(sample), clear_interest_cache),
+        "process_all_users": (lambda _: vector_db.process_all_users(collection, users_path, 10), len(users), clear_interest_cache),
+        "filter_recommendations": (filter_sample, len(sample), None),
+    }
+
+    results = []
+    for name, (run, items, setup) in benchmarks.items():
+        result = measure(run, items, repeat, setup)
+        result.update({"benchmark": name, "size": size})
+        results.append(result)
+        print(f"{name:28s} size {size:>8d}  p50 {result['p50_ms']:10.2f} ms  p99 {result['p99_ms']:10.2f} ms  "
+              f"{result['throughput_per_s']:12,.0f} items/s  peak {result['peak_mb']:8.1f} MB", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Benchmarks whose p50 latency grew by more than threshold (a fraction) over the baseline."""
+    baseline_by_key = {(result["benchmark"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        reference = baseline_by_key.get((result["benchmark"], result["size"]))
+        if reference is None or not reference["p50_ms"]:
+            continue
+        change = result["p50_ms"] / reference["p50_ms"] - 1
+        if change > threshold:
+            regressions.append({
+                "benchmark": result["benchmark"],
+                "size": result["size"],
+                "baseline_p50_ms": reference["p50_ms"],
+                "p50_ms": result["p50_ms"],
+                "change": change
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="content items per dataset (users: a tenth)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown before flagging, as a fraction")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = [result for size in args.sizes for result in run_suite(size, args.repeat, work_dir)]
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend_name(),
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} size {regression['size']}: "
+                  f"p50 {regression['baseline_p50_ms']:.2f} -> {regression['p50_ms']:.2f} ms "
+                  f"(+{regression['change']:.0%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
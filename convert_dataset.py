@@ -0,0 +1,41 @@
+"""Convert a content JSON file into the binary, memory-mappable dataset format.
+
+Every content loader accepts the .cbin file in place of content.json and maps
+it instead of parsing JSON: load_content_store (and so the simple apps'
+IncrementalMatcher and build_content_index), load_json and
+load_data(content_path=...). To use it in an app, change its content path
+(CONTENT_FILE_PATH in the simple apps). Re-run after content.json changes;
+the output file is replaced atomically.
+
+Usage:
+    python convert_dataset.py [--input ./data/content.json] [--output ./data/content.cbin]
+"""
+import argparse
+import os
+import time
+
+from helper_functions.binary_dataset import BINARY_SUFFIX, convert_json, open_binary_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", default="./data/content.json", help="content JSON file")
+    parser.add_argument("--output", help=f"binary dataset to write (default: the input with a {BINARY_SUFFIX} suffix)")
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.input)[0] + BINARY_SUFFIX
+    if not output.endswith(BINARY_SUFFIX):
+        parser.error(f"the output file must end with {BINARY_SUFFIX}")
+
+    start = time.perf_counter()
+    count = convert_json(args.input, output)
+    converted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    open_binary_dataset(output)
+    opened = time.perf_counter() - start
+    print(f"Wrote {count} items to {output} ({os.path.getsize(args.input):,} -> {os.path.getsize(output):,} bytes) "
+          f"in {converted:.1f}s; opening it takes {opened * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
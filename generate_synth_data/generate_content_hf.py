@@ -1,6 +1,5 @@
 import json
 import random
-from transformers import pipeline, set_seed
 
 # Define the interest types and countries
 INTEREST_TYPES = [
@@ -14,47 +13,69 @@ INTEREST_TYPES = [
 
 COUNTRIES = ["United States", "Canada", "Germany", "Japan", "Brazil", "United Kingdom", "Italy"]
 
-# Initialize the GPT-2 text generation pipeline
-generator = pipeline('text-generation', model='gpt2')
-set_seed(42)
+# Prompts sent to the pipeline in one call
+DEFAULT_BATCH_SIZE = 16
 
-def generate_json_data(num_entries):
+# The GPT-2 text generation pipeline is created on first use, so importing this
+# module does not load transformers or the model
+generator = None
+
+def get_generator():
+    """Create the GPT-2 text generation pipeline once."""
+    global generator
+    if generator is None:
+        from transformers import pipeline
+        generator = pipeline('text-generation', model='gpt2', pad_token_id=50256)
+        # GPT-2 has to be padded on the left to generate prompts in batches
+        generator.tokenizer.padding_side = 'left'
+    return generator
+
+def clean_generated_content(generated_content):
+    # Remove the prompt from the generated content
+    # We can split the generated content by the first period to get the relevant part
+    if '.' in generated_content:
+        return generated_content.split('.', 1)[1].strip()  # Get text after the first period
+    return generated_content.strip()  # If no period, just strip whitespace
+
+def generate_json_data(num_entries, start=0, rng=random, batch_size=DEFAULT_BATCH_SIZE):
+    """Generate num_entries content entries with ids start + 1 onwards.
+
+    Every prompt is chosen first, then the texts are generated batch_size
+    prompts per pipeline call.
+    """
     data = []
+    prompts = []
     
-    for i in range(num_entries):
+    for i in range(start, start + num_entries):
         # Randomly choose an interest and a country
-        interest = random.choice(INTEREST_TYPES)
-        country = random.choice(COUNTRIES)
-        prompt = f"Generate content about {interest} in {country}."
-        
-        # Generate content using GPT-2
-        generated_content = generator(prompt, max_length=100, num_return_sequences=1)[0]['generated_text']
-        
-        # Remove the prompt from the generated content
-        # We can split the generated content by the first period to get the relevant part
-        if '.' in generated_content:
-            generated_content = generated_content.split('.', 1)[1].strip()  # Get text after the first period
-        else:
-            generated_content = generated_content.strip()  # If no period, just strip whitespace
+        interest = rng.choice(INTEREST_TYPES)
+        country = rng.choice(COUNTRIES)
+        prompts.append(f"Generate content about {interest} in {country}.")
 
         entry = {
             "id": str(i + 1),
             "title": f"My title {i + 1}",
-            "content": generated_content,
+            "content": None,
             "tags": [
                 {
                     "type": "interest",
                     "value": interest,
-                    "threshold": round(random.uniform(0.1, 1.0), 2)
+                    "threshold": round(rng.uniform(0.1, 1.0), 2)
                 },
                 {
                     "type": "country",
                     "value": country,
-                    "threshold": round(random.uniform(0.1, 1.0), 2)
+                    "threshold": round(rng.uniform(0.1, 1.0), 2)
                 }
             ]
         }
         data.append(entry)
+
+    # Generate content using GPT-2
+    if prompts:
+        results = get_generator()(prompts, max_length=100, num_return_sequences=1, batch_size=batch_size)
+        for entry, result in zip(data, results):
+            entry["content"] = clean_generated_content(result[0]['generated_text'])
     
     return data
 
@@ -62,10 +83,14 @@ def save_to_json_file(data, filename):
     with open(filename, 'w') as json_file:
         json.dump(data, json_file, indent=4)
 
-# Generate JSON data with 1000 entries
-json_data = generate_json_data(1000)
+if __name__ == "__main__":
+    from transformers import set_seed
+    set_seed(42)
+
+    # Generate JSON data with 1000 entries
+    json_data = generate_json_data(1000)
 
-# Save the data to a JSON file
-save_to_json_file(json_data, 'content.json')
+    # Save the data to a JSON file
+    save_to_json_file(json_data, 'content.json')
 
-print("Data has been saved to content.json")
\ No newline at end of file
+    print("Data has been saved to content.json")
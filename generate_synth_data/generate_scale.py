@@ -0,0 +1,226 @@
+"""Fast template-based synthetic content and users for load testing.
+
+No language model is involved: texts are assembled from templates and a
+fixed vocabulary, and every random choice is drawn with NumPy in chunks, so
+millions of records are generated per minute. The records follow the
+content.json / users.json schema and reuse the interest types and countries
+of the GPT-2 generators. Tags carry a value from a per-interest-type
+vocabulary, so users and content share (type, value) pairs for the tag
+matchers to find.
+
+Popularity of countries, interest types and values follows a Zipf-like
+distribution: the k-th most popular choice has weight 1 / k ** skew, so
+skew 0 is uniform and larger values concentrate the data on a few tags. The
+output is identical for identical arguments and seed.
+
+Usage:
+    python -m generate_synth_data.generate_scale content --count 1000000 --output content_1m.json
+    python -m generate_synth_data.generate_scale users --count 100000 --output users_100k.json --skew 1.2
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from generate_synth_data.generate_content_hf import INTEREST_TYPES, COUNTRIES
+
+ADJECTIVES = [
+    "classic", "modern", "local", "urban", "rural", "vintage", "digital", "seasonal", "amateur", "professional",
+    "traditional", "experimental", "family", "weekend", "budget", "premium", "beginner", "advanced", "community", "solo",
+    "indoor", "outdoor", "sustainable", "historic", "popular", "independent", "regional", "international", "casual", "competitive"
+]
+
+FILLER_WORDS = [
+    "the", "a", "with", "and", "for", "about", "guide", "story", "tips", "people", "new", "best", "how", "why",
+    "every", "week", "year", "event", "review", "ideas", "places", "time", "world", "first", "great", "small",
+    "big", "local", "friends", "plan", "learn", "share", "find", "start", "favourite", "simple", "long", "short"
+]
+
+TEMPLATES = [
+    "A look at {value} in {country}.",
+    "Why {value} is popular in {country}.",
+    "{country} and the rise of {value}.",
+    "Getting started with {value} in {country}."
+]
+
+# Records generated per vectorized draw
+CHUNK_SIZE = 10000
+
+DEFAULTS = {
+    "skew": 1.0,
+    "values_per_type": 30,
+    "tags_per_item": (1, 3),
+    "interests_per_user": (1, 4),
+    "text_words": (20, 60)
+}
+
+
+def interest_values(values_per_type):
+    """Vocabulary of values of every interest type, most popular first."""
+    values = {}
+    for interest_type in INTEREST_TYPES:
+        values[interest_type] = [
+            f"{ADJECTIVES[j % len(ADJECTIVES)]} {interest_type}" + (f" {j // len(ADJECTIVES) + 1}" if j >= len(ADJECTIVES) else "")
+            for j in range(values_per_type)
+        ]
+    return values
+
+
+def zipf_cdf(size, skew):
+    """Cumulative Zipf-like distribution over size ranked choices."""
+    weights = 1.0 / np.arange(1, size + 1) ** skew
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def sample(rng, cdf, shape):
+    """Ranked choices drawn from a cumulative distribution."""
+    return np.minimum(np.searchsorted(cdf, rng.random(shape), side='right'), len(cdf) - 1)
+
+
+def thresholds(rng, low, size):
+    return np.round(rng.uniform(low, 1.0, size), 2).tolist()
+
+
+class Vocabulary:
+    """Skewed samplers of countries, interest types and values, shared by both record kinds."""
+
+    def __init__(self, skew, values_per_type):
+        self.values = interest_values(values_per_type)
+        self.country_cdf = zipf_cdf(len(COUNTRIES), skew)
+        self.type_cdf = zipf_cdf(len(INTEREST_TYPES), skew)
+        self.value_cdf = zipf_cdf(values_per_type, skew)
+
+    def countries(self, rng, size):
+        return [COUNTRIES[index] for index in sample(rng, self.country_cdf, size)]
+
+    def interests(self, rng, size):
+        """(type, value) pairs: a skewed type, then a skewed value of that type."""
+        types = sample(rng, self.type_cdf, size)
+        values = sample(rng, self.value_cdf, size)
+        return [
+            (INTEREST_TYPES[type_index], self.values[INTEREST_TYPES[type_index]][value_index])
+            for type_index, value_index in zip(types.tolist(), values.tolist())
+        ]
+
+
+def iter_content(count, seed=42, skew=DEFAULTS["skew"], values_per_type=DEFAULTS["values_per_type"],
+                 tags_per_item=DEFAULTS["tags_per_item"], text_words=DEFAULTS["text_words"]):
+    """Yield count content items in the content.json schema.
+
+    Every item has an "interest" tag and a "country" tag like the GPT-2
+    content, plus tags_per_item (min, max) tags typed by interest type.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = Vocabulary(skew, values_per_type)
+    for start in range(0, count, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, count - start)
+        countries = vocabulary.countries(rng, size)
+        tag_counts = rng.integers(tags_per_item[0], tags_per_item[1] + 1, size)
+        tags = vocabulary.interests(rng, int(tag_counts.sum()))
+        tag_thresholds = thresholds(rng, 0.1, int(tag_counts.sum()) + 2 * size)
+        word_counts = rng.integers(text_words[0], text_words[1] + 1, size)
+        words = np.array(FILLER_WORDS, dtype=object)[rng.integers(0, len(FILLER_WORDS), int(word_counts.sum()))].tolist()
+        templates = rng.integers(0, len(TEMPLATES), size).tolist()
+
+        tag_position = 0
+        word_position = 0
+        threshold_position = 0
+        for offset in range(size):
+            item_tags = tags[tag_position:tag_position + tag_counts[offset]]
+            tag_position += tag_counts[offset]
+            main_type, main_value = item_tags[0] if item_tags else (INTEREST_TYPES[0], None)
+            country = countries[offset]
+            text = TEMPLATES[templates[offset]].format(value=main_value or main_type, country=country)
+            filler = " ".join(words[word_position:word_position + word_counts[offset]])
+            word_position += word_counts[offset]
+
+            item_thresholds = tag_thresholds[threshold_position:threshold_position + len(item_tags) + 2]
+            threshold_position += len(item_tags) + 2
+            yield {
+                "id": str(start + offset + 1),
+                "title": f"My title {start + offset + 1}",
+                "content": f"{text} {filler}" if filler else text,
+                "tags": [
+                    {"type": "interest", "value": main_type, "threshold": item_thresholds[0]},
+                    {"type": "country", "value": country, "threshold": item_thresholds[1]}
+                ] + [
+                    {"type": tag_type, "value": value, "threshold": threshold}
+                    for (tag_type, value), threshold in zip(item_tags, item_thresholds[2:])
+                ]
+            }
+
+
+def iter_users(count, seed=42, skew=DEFAULTS["skew"], values_per_type=DEFAULTS["values_per_type"],
+               interests_per_user=DEFAULTS["interests_per_user"]):
+    """Yield count users in the users.json schema: a country interest plus interests_per_user (min, max) others."""
+    # A different stream than the content generated with the same seed
+    rng = np.random.default_rng([seed, 1])
+    vocabulary = Vocabulary(skew, values_per_type)
+    for start in range(0, count, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, count - start)
+        countries = vocabulary.countries(rng, size)
+        interest_counts = rng.integers(interests_per_user[0], interests_per_user[1] + 1, size)
+        interests = vocabulary.interests(rng, int(interest_counts.sum()))
+        interest_thresholds = thresholds(rng, 0.0, int(interest_counts.sum()) + size)
+
+        interest_position = 0
+        threshold_position = 0
+        for offset in range(size):
+            user_interests = interests[interest_position:interest_position + interest_counts[offset]]
+            interest_position += interest_counts[offset]
+            user_thresholds = interest_thresholds[threshold_position:threshold_position + len(user_interests) + 1]
+            threshold_position += len(user_interests) + 1
+            yield {
+                "name": f"User {start + offset + 1}",
+                "interests": [{"type": "country", "value": countries[offset], "threshold": user_thresholds[0]}] + [
+                    {"type": interest_type, "value": value, "threshold": threshold}
+                    for (interest_type, value), threshold in zip(user_interests, user_thresholds[1:])
+                ]
+            }
+
+
+def write_json_array(records, file_path):
+    """Stream records into a JSON array, one record per line; returns the record count."""
+    count = 0
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, 'w') as file:
+        file.write('[')
+        for record in records:
+            file.write(('\n' if count == 0 else ',\n') + json.dumps(record))
+            count += 1
+        file.write('\n]\n' if count else ']\n')
+    os.replace(temporary_path, file_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=["content", "users"], help="records to generate")
+    parser.add_argument("--count", type=int, required=True, help="number of records")
+    parser.add_argument("--output", required=True, help="JSON file to write")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--skew", type=float, default=DEFAULTS["skew"], help="Zipf exponent of tag popularity (0 = uniform)")
+    parser.add_argument("--values-per-type", type=int, default=DEFAULTS["values_per_type"], help="distinct values per interest type")
+    parser.add_argument("--tags-per-item", type=int, nargs=2, default=DEFAULTS["tags_per_item"], metavar=("MIN", "MAX"),
+                        help="typed tags per content item, besides the interest and country tags")
+    parser.add_argument("--interests-per-user", type=int, nargs=2, default=DEFAULTS["interests_per_user"], metavar=("MIN", "MAX"),
+                        help="interests per user, besides the country")
+    parser.add_argument("--text-words", type=int, nargs=2, default=DEFAULTS["text_words"], metavar=("MIN", "MAX"),
+                        help="filler words per content text")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.kind == "content":
+        records = iter_content(args.count, args.seed, args.skew, args.values_per_type, args.tags_per_item, args.text_words)
+    else:
+        records = iter_users(args.count, args.seed, args.skew, args.values_per_type, args.interests_per_user)
+    count = write_json_array(records, args.output)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} {args.kind} records to {args.output} in {elapsed:.1f}s ({count / elapsed * 60:,.0f} per minute)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Generate synthetic content or users in seeded, resumable shards.
+
+The records are split into contiguous shards, each written to its own JSON
+Lines file one batch at a time. Re-running the same command skips completed
+shards and resumes partial ones from their last complete batch; shards can be
+generated by several processes at once. Finally the shards are merged into a
+single file in the content.json / users.json schema.
+
+Every batch is generated from a random state derived from the seed and the
+index of its first record, so a record's tags, thresholds and prompts do not
+depend on the number of shards, the worker count or on interruptions.
+
+Usage:
+    python -m generate_synth_data.generate_shards content --count 1000 --output content.json
+    python -m generate_synth_data.generate_shards users --count 100 --output users.json --workers 4
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import random
+
+from generate_synth_data import generate_content_hf, generate_users_hf
+
+DEFAULT_SHARD_COUNT = 8
+DEFAULT_SHARD_DIR = 'shards'
+
+
+def generate_records(kind, start, count, rng, batch_size):
+    """count records of kind ('content' or 'users'), the first one having index start."""
+    if kind == 'content':
+        return generate_content_hf.generate_json_data(count, start=start, rng=rng, batch_size=batch_size)
+    if kind == 'users':
+        return generate_users_hf.generate_users(count, rng=rng, batch_size=batch_size)
+    raise ValueError(f"Unknown record kind {kind!r}, expected 'content' or 'users'")
+
+
+def shard_range(shard, shard_count, total):
+    """First record index and record count of one shard."""
+    start = shard * total // shard_count
+    return start, (shard + 1) * total // shard_count - start
+
+
+def shard_path(shard_dir, kind, shard, shard_count):
+    return os.path.join(shard_dir, f"{kind}-{shard:05d}-of-{shard_count:05d}.jsonl")
+
+
+def completed_records(file_path, batch_size, count):
+    """Records already in a shard file of count records.
+
+    A trailing partial line is dropped. An unfinished shard is also cut back
+    to its last complete batch, so the batch is regenerated from its own
+    random state; a shard holding count records is complete, even when its
+    last batch is shorter than batch_size.
+    """
+    if not os.path.exists(file_path):
+        return 0
+    with open(file_path, 'rb+') as file:
+        lines = file.read().split(b'\n')
+        # The last element is empty when the file ends with a complete line
+        complete = len(lines) - 1
+        if complete < count:
+            complete -= complete % batch_size
+        file.seek(sum(len(line) + 1 for line in lines[:complete]))
+        file.truncate()
+    return complete
+
+
+def seed_batch(seed, start):
+    """Random state of the batch whose first record has index start."""
+    try:
+        from transformers import set_seed
+        set_seed(seed + start)
+    except ImportError:
+        pass
+    return random.Random(f"{seed}:{start}")
+
+
+def run_shard(kind, shard, shard_count, total, seed, batch_size, shard_dir):
+    """Generate (the rest of) one shard; returns the number of records generated now."""
+    start, count = shard_range(shard, shard_count, total)
+    file_path = shard_path(shard_dir, kind, shard, shard_count)
+    done = completed_records(file_path, batch_size, count)
+
+    generated = 0
+    with open(file_path, 'a') as file:
+        for offset in range(done, count, batch_size):
+            batch_count = min(batch_size, count - offset)
+            rng = seed_batch(seed, start + offset)
+            records = generate_records(kind, start + offset, batch_count, rng, batch_size)
+            file.write(''.join(json.dumps(record) + '\n' for record in records))
+            # A batch is on disk before the next one starts
+            file.flush()
+            os.fsync(file.fileno())
+            generated += batch_count
+    return generated
+
+
+def merge_shards(kind, shard_count, shard_dir, output_path):
+    """Concatenate the shards into one JSON array formatted like the original generators."""
+    temporary_path = f"{output_path}.tmp"
+    with open(temporary_path, 'w') as output:
+        output.write('[')
+        separator = '\n'
+        for shard in range(shard_count):
+            with open(shard_path(shard_dir, kind, shard, shard_count), 'r') as file:
+                for line in file:
+                    record = json.dumps(json.loads(line), indent=4)
+                    output.write(separator + '\n'.join('    ' + record_line for record_line in record.split('\n')))
+                    separator = ',\n'
+        output.write('\n]' if separator != '\n' else ']')
+    os.replace(temporary_path, output_path)
+
+
+def generate_sharded(kind, total, output_path, shard_count=DEFAULT_SHARD_COUNT, workers=1, seed=42,
+                     batch_size=generate_content_hf.DEFAULT_BATCH_SIZE, shard_dir=DEFAULT_SHARD_DIR):
+    """Generate every missing shard, with workers processes, and merge them into output_path."""
+    os.makedirs(shard_dir, exist_ok=True)
+    arguments = [(kind, shard, shard_count, total, seed, batch_size, shard_dir) for shard in range(shard_count)]
+    if workers == 1:
+        generated = [run_shard(*shard_arguments) for shard_arguments in arguments]
+    else:
+        # Every worker process loads its own pipeline
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            generated = list(executor.map(run_shard, *zip(*arguments)))
+    merge_shards(kind, shard_count, shard_dir, output_path)
+    return sum(generated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=["content", "users"], help="records to generate")
+    parser.add_argument("--count", type=int, required=True, help="total number of records")
+    parser.add_argument("--output", required=True, help="merged JSON file")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARD_COUNT, help="number of shards")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating shards in parallel")
+    parser.add_argument("--batch-size", type=int, default=generate_content_hf.DEFAULT_BATCH_SIZE, help="prompts per pipeline call")
+    parser.add_argument("--seed", type=int, default=42, help="base random seed")
+    parser.add_argument("--shard-dir", default=DEFAULT_SHARD_DIR, help="directory of the shard files")
+    args = parser.parse_args()
+
+    generated = generate_sharded(args.kind, args.count, args.output, args.shards, args.workers,
+                                 args.seed, args.batch_size, args.shard_dir)
+    print(f"Generated {generated} new {args.kind} records; merged {args.count} into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,5 @@
 import json
 import random
-from transformers import pipeline
-
-# Load the text generation pipeline with pad_token_id set to eos_token_id
-generator = pipeline('text-generation', model='gpt2', pad_token_id=50256)
 
 # Expanded list of possible interest types
 INTEREST_TYPES = [
@@ -17,13 +13,29 @@ INTEREST_TYPES = [
 
 countries = ["United States", "Canada", "Germany", "Japan", "Brazil", "United Kingdom", "Italy"]
 
-def generate_value(interest_type):
-    """Generate a value for the given interest type using Hugging Face model."""
-    prompt = f"A realistic {interest_type} could be: "
-    result = generator(prompt, max_length=30, num_return_sequences=1, do_sample=True, top_k=50)
-    
-    # Extract the generated text and clean it up
-    generated_text = result[0]['generated_text'].strip()
+# Prompts sent to the pipeline in one call
+DEFAULT_BATCH_SIZE = 16
+
+# The text generation pipeline is created on first use, so importing this
+# module does not load transformers or the model
+generator = None
+
+def get_generator():
+    """Load the text generation pipeline with pad_token_id set to eos_token_id, once."""
+    global generator
+    if generator is None:
+        from transformers import pipeline
+        generator = pipeline('text-generation', model='gpt2', pad_token_id=50256)
+        # GPT-2 has to be padded on the left to generate prompts in batches
+        generator.tokenizer.padding_side = 'left'
+    return generator
+
+def value_prompt(interest_type):
+    return f"A realistic {interest_type} could be: "
+
+def clean_value(prompt, generated_text):
+    """Extract the interest value from the text generated for prompt."""
+    generated_text = generated_text.strip()
     
     # Remove the prompt part from the generated text
     if generated_text.startswith(prompt):
@@ -38,29 +50,40 @@ def generate_value(interest_type):
     else:
         return value
 
-def generate_user():
-    """Generate a single user with a name and a list of interests."""
-    name = f"User {random.randint(1, 100000)}"  # Simple name generation for demonstration
+def generate_values(interest_types, batch_size=DEFAULT_BATCH_SIZE):
+    """Generate one value per interest type, batch_size prompts per pipeline call."""
+    prompts = [value_prompt(interest_type) for interest_type in interest_types]
+    if not prompts:
+        return []
+    results = get_generator()(prompts, max_length=30, num_return_sequences=1, do_sample=True, top_k=50, batch_size=batch_size)
+    return [clean_value(prompt, result[0]['generated_text']) for prompt, result in zip(prompts, results)]
+
+def generate_value(interest_type):
+    """Generate a value for the given interest type using Hugging Face model."""
+    return generate_values([interest_type])[0]
+
+def plan_user(rng=random):
+    """A user with a name, a country interest and 1 to 4 other interests whose values are still to be generated."""
+    name = f"User {rng.randint(1, 100000)}"  # Simple name generation for demonstration
     
     # Generate the country interest first
     country_interest = {
         "type": "country",
-        "value": random.choice(countries),
-        "threshold": round(random.uniform(0, 1), 2)
+        "value": rng.choice(countries),
+        "threshold": round(rng.uniform(0, 1), 2)
     }
     
     # Generate other interests, ensuring the country interest is included only once
     other_interests = []
-    num_other_interests = random.randint(1, 4)  # Generate 1 to 4 other interests
+    num_other_interests = rng.randint(1, 4)  # Generate 1 to 4 other interests
 
     # Generate other interests without including "country"
     for _ in range(num_other_interests):
-        interest_type = random.choice(INTEREST_TYPES)
-        value = generate_value(interest_type)
-        threshold = round(random.uniform(0, 1), 2)
+        interest_type = rng.choice(INTEREST_TYPES)
+        threshold = round(rng.uniform(0, 1), 2)
         other_interests.append({
             "type": interest_type,
-            "value": value,
+            "value": None,
             "threshold": threshold
         })
 
@@ -68,16 +91,24 @@ def generate_user():
     interests = [country_interest] + other_interests
     return {"name": name, "interests": interests}
 
-def generate_users(num_users):
-    """Generate a list of users."""
-    users = [generate_user() for _ in range(num_users)]
+def generate_user():
+    """Generate a single user with a name and a list of interests."""
+    return generate_users(1)[0]
+
+def generate_users(num_users, rng=random, batch_size=DEFAULT_BATCH_SIZE):
+    """Generate a list of users, generating the values of all their interests in batches."""
+    users = [plan_user(rng) for _ in range(num_users)]
+    pending = [interest for user in users for interest in user["interests"] if interest["value"] is None]
+    for interest, value in zip(pending, generate_values([interest["type"] for interest in pending], batch_size)):
+        interest["value"] = value
     return users
 
-# Generate 100 users
-users = generate_users(100)
+if __name__ == "__main__":
+    # Generate 100 users
+    users = generate_users(100)
 
-# Save to JSON file
-with open("users.json", "w") as f:
-    json.dump(users, f, indent=4)
+    # Save to JSON file
+    with open("users.json", "w") as f:
+        json.dump(users, f, indent=4)
 
-print("Generated users.json with synthetic data.")
+    print("Generated users.json with synthetic data.")
@@ -0,0 +1,33 @@
+import streamlit as st
+
+from helper_functions.change_tracking import IncrementalMatcher, FileWatcher, file_version
+
+# Seconds between two checks of the watched data files
+WATCH_INTERVAL = 2.0
+
+# Process-wide state shared by the Streamlit apps across sessions and reruns.
+
+
+@st.cache_resource(show_spinner=False)
+def start_incremental_matcher(users_path, content_path, top_n, require_country=False, interval=WATCH_INTERVAL):
+    """Ranked matches of every user, kept current by a background watcher of both files.
+
+    Built once per process; afterwards every edit of a data file only
+    re-ranks the users affected by the changed records.
+    """
+    matcher = IncrementalMatcher(top_n, require_country)
+    matcher.refresh(users_path, content_path)
+    matcher.watcher = FileWatcher([users_path, content_path], lambda changed: matcher.refresh(users_path, content_path), interval).start()
+    return matcher
+
+
+def rerun_on_change(file_paths, interval=WATCH_INTERVAL):
+    """Rerun the app once one of the files changed, so open pages pick up edits without interaction."""
+    versions = [file_version(file_path) for file_path in file_paths]
+
+    @st.fragment(run_every=interval)
+    def watch():
+        if [file_version(file_path) for file_path in file_paths] != versions:
+            st.rerun()
+
+    watch()
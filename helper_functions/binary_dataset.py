@@ -0,0 +1,127 @@
+"""Compact binary, memory-mappable form of a content file.
+
+A dataset file holds the columns of a ContentStore:
+
+    magic (8 bytes) | header length (uint64, little-endian) | JSON header | sections
+
+The header records the format version, the item count and, for every
+section, its dtype, byte offset and element count. Sections are the fixed
+width columns (field masks, category codes, priorities, tag offsets and tag
+codes / thresholds), the UTF-8 buffers and offsets of the id, title and text
+string columns, the string table shared by tag types, tag values and
+categories, and the extra fields as JSON. Every section starts on a 64-byte
+boundary.
+
+Opening a dataset maps the file and wraps each section in a NumPy view, so
+nothing is parsed or copied up front and records are decoded field by field
+on access through the same ContentRecord views as a store built from JSON.
+"""
+import json
+import os
+
+import numpy as np
+
+from helper_functions.content_store import ContentStore, StringColumn, load_content_store
+
+BINARY_SUFFIX = '.cbin'
+MAGIC = b'CONTENT\x01'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+HEADER_LENGTH = np.dtype('<u8')
+
+
+def is_binary_dataset(file_path):
+    """Binary datasets are recognised by their suffix, without opening the file."""
+    return os.fspath(file_path).endswith(BINARY_SUFFIX)
+
+
+def store_sections(store):
+    """(name, array) of every section of a store, in file order."""
+    extras = {str(position): item_extras for position, item_extras in store.extras.items()}
+    strings = store.strings if isinstance(store.strings, StringColumn) else StringColumn.from_strings(store.strings)
+    sections = [
+        ("fields", store.fields),
+        ("categories", store.categories),
+        ("priorities", store.priorities),
+        ("tag_offsets", store.tag_offsets),
+        ("tag_types", store.tag_types),
+        ("tag_values", store.tag_values),
+        ("tag_thresholds", store.tag_thresholds)
+    ]
+    for name, column in (("ids", store.ids), ("titles", store.titles), ("texts", store.texts), ("strings", strings)):
+        sections.append((f"{name}.buffer", np.frombuffer(column.buffer, dtype=np.uint8)))
+        sections.append((f"{name}.offsets", column.offsets))
+    sections.append(("extras", np.frombuffer(json.dumps(extras).encode('utf-8'), dtype=np.uint8)))
+    # Little-endian on disk whatever the platform
+    return [(name, np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))) for name, array in sections]
+
+
+def write_binary_dataset(store, file_path):
+    """Write a ContentStore as a binary dataset; the file is replaced atomically."""
+    sections = store_sections(store)
+    # Offsets are relative to the end of the header, so they do not depend on its length
+    layout = {}
+    offset = 0
+    for name, array in sections:
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += array.nbytes
+    header = json.dumps({"version": FORMAT_VERSION, "count": len(store), "sections": layout}).encode('utf-8')
+    data_start = -(-(len(MAGIC) + HEADER_LENGTH.itemsize + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array(len(header), dtype=HEADER_LENGTH).tobytes())
+        file.write(header)
+        for name, array in sections:
+            file.seek(data_start + layout[name]["offset"])
+            file.write(array.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, file_path)
+
+
+def open_binary_dataset(file_path):
+    """Map a binary dataset as a ContentStore whose columns are views of the file."""
+    with open(file_path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{file_path} is not a binary content dataset")
+        header_length = int(np.frombuffer(file.read(HEADER_LENGTH.itemsize), dtype=HEADER_LENGTH)[0])
+        header = json.loads(file.read(header_length))
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary dataset version {header['version']} in {file_path}")
+    data_start = -(-(len(MAGIC) + HEADER_LENGTH.itemsize + header_length) // ALIGNMENT) * ALIGNMENT
+
+    mapped = np.memmap(file_path, dtype=np.uint8, mode='r')
+    sections = {}
+    for name, section in header["sections"].items():
+        dtype = np.dtype(section["dtype"])
+        start = data_start + section["offset"]
+        sections[name] = mapped[start:start + section["length"] * dtype.itemsize].view(dtype)
+
+    def string_column(name):
+        return StringColumn(sections[f"{name}.buffer"], sections[f"{name}.offsets"])
+
+    extras = json.loads(sections["extras"].tobytes()) if len(sections["extras"]) else {}
+    return ContentStore(
+        fields=sections["fields"],
+        ids=string_column("ids"),
+        titles=string_column("titles"),
+        texts=string_column("texts"),
+        categories=sections["categories"],
+        priorities=sections["priorities"],
+        tag_offsets=sections["tag_offsets"],
+        tag_types=sections["tag_types"],
+        tag_values=sections["tag_values"],
+        tag_thresholds=sections["tag_thresholds"],
+        strings=string_column("strings"),
+        extras={int(position): item_extras for position, item_extras in extras.items()}
+    )
+
+
+def convert_json(json_path, output_path):
+    """Convert a content JSON file into a binary dataset; returns the item count."""
+    store = load_content_store(json_path)
+    write_binary_dataset(store, output_path)
+    return len(store)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from helper_functions.helper_functions import iter_json_array, file_content_hash, build_tag_index, rank_content
+from helper_functions.content_store import ContentStore, load_content_store
+
+logger = logging.getLogger(__name__)
+
+
+def record_hash(record):
+    """Hash of a record's content, independent of key order."""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def diff_records(previous_hashes, records, key):
+    """Delta between the previous key -> hash map and the current records.
+
+    Returns the delta as {"added", "modified", "removed"} lists of keys (in
+    file order where they exist), the current records by key and their hashes.
+    """
+    current = {}
+    current_hashes = {}
+    for record in records:
+        record_key = record[key]
+        current[record_key] = record
+        current_hashes[record_key] = record_hash(record)
+    delta = {
+        "added": [record_key for record_key in current_hashes if record_key not in previous_hashes],
+        "modified": [
+            record_key for record_key, digest in current_hashes.items()
+            if record_key in previous_hashes and previous_hashes[record_key] != digest
+        ],
+        "removed": [record_key for record_key in previous_hashes if record_key not in current_hashes]
+    }
+    return delta, current, current_hashes
+
+
+def file_version(file_path):
+    """(mtime, size) of a file, or None when it does not exist."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def tag_keys(item):
+    return {(tag['type'], tag['value']) for tag in item.get('tags', [])}
+
+
+class IncrementalMatcher:
+    """Ranked top-N matches of every user, kept up to date from record deltas.
+
+    Content is held as a ContentStore with its build_tag_index index; each
+    new version of the content or users file is diffed by id / name and
+    record hash against the version applied before. A content change only
+    re-ranks the users with an interest in one of the old or new tags of the
+    changed items, and a user change only re-ranks that user. rank_content
+    breaks ties by content position, so when the items kept from the
+    previous version change their relative order every user is re-ranked.
+    Rankings are kept as content ids and resolved against the current store
+    when read, so they equal a full rank_all_users over the current files.
+    Content ids must be unique.
+    """
+
+    def __init__(self, top_n, require_country=False):
+        self.top_n = top_n
+        self.require_country = require_country
+        self.lock = threading.RLock()
+        self.content = ContentStore.from_records([])
+        self.tag_index = {}
+        self.positions = {}
+        self.content_hashes = {}
+        self.users = {}
+        self.user_hashes = {}
+        self.users_by_key = {}
+        self.rankings = {}
+        self.file_versions = {}
+
+    def ranking(self, user_name):
+        """Best (item, score) pairs of a user, best first."""
+        with self.lock:
+            return [(self.content[self.positions[item_id]], score) for item_id, score in self.rankings.get(user_name, [])]
+
+    def user_names(self):
+        with self.lock:
+            return list(self.users)
+
+    def user(self, user_name):
+        with self.lock:
+            return self.users[user_name]
+
+    def _rank(self, user_name):
+        interests = self.users[user_name]['interests']
+        self.rankings[user_name] = [
+            (item['id'], score)
+            for item, score in rank_content(interests, self.content, self.tag_index, self.top_n, self.require_country)
+        ]
+
+    def apply_content(self, content, tag_index=None):
+        """Switch to a new content store; returns the delta and the number of re-ranked users."""
+        with self.lock:
+            records = [dict(item) for item in content]
+            positions = {}
+            for position, item in enumerate(records):
+                if item['id'] in positions:
+                    raise ValueError(f"Duplicate content id {item['id']!r}")
+                positions[item['id']] = position
+            delta, current, content_hashes = diff_records(self.content_hashes, records, 'id')
+            # Positions of the kept items in the previous content, in their new order
+            kept_positions = [self.positions[item_id] for item_id in positions if item_id in self.positions]
+            reordered = any(earlier > later for earlier, later in zip(kept_positions, kept_positions[1:]))
+            affected_keys = set()
+            for item_id in delta["removed"] + delta["modified"]:
+                affected_keys |= tag_keys(self.content[self.positions[item_id]])
+            for item_id in delta["modified"] + delta["added"]:
+                affected_keys |= tag_keys(current[item_id])
+
+            self.content = content
+            self.tag_index = build_tag_index(content) if tag_index is None else tag_index
+            self.positions = positions
+            self.content_hashes = content_hashes
+
+            if reordered:
+                # Ties of any user may now resolve differently
+                affected_users = set(self.users)
+            else:
+                affected_users = set()
+                for key in affected_keys:
+                    affected_users |= self.users_by_key.get(key, set())
+            for user_name in affected_users:
+                self._rank(user_name)
+            return delta, len(affected_users)
+
+    def apply_users(self, records):
+        """Apply the current user records; returns the delta and the number of re-ranked users."""
+        with self.lock:
+            delta, current, self.user_hashes = diff_records(self.user_hashes, records, 'name')
+            for user_name in delta["removed"] + delta["modified"]:
+                for interest in self.users[user_name]['interests']:
+                    self.users_by_key.get((interest['type'], interest['value']), set()).discard(user_name)
+            for user_name in delta["removed"]:
+                self.rankings.pop(user_name, None)
+            self.users = current
+            for user_name in delta["modified"] + delta["added"]:
+                for interest in current[user_name]['interests']:
+                    self.users_by_key.setdefault((interest['type'], interest['value']), set()).add(user_name)
+                self._rank(user_name)
+            return delta, len(delta["modified"]) + len(delta["added"])
+
+    def refresh(self, users_path, content_path):
+        """Apply the changes of the data files since the last refresh; returns what changed."""
+        changes = {}
+        with self.lock:
+            for kind, file_path, apply, load in (("content", content_path, self.apply_content, load_content_store),
+                                                 ("users", users_path, self.apply_users, iter_json_array)):
+                version = file_content_hash(file_path)
+                if self.file_versions.get(kind) == version:
+                    continue
+                delta, reranked = apply(load(file_path))
+                self.file_versions[kind] = version
+                changes[kind] = {**{change: len(keys) for change, keys in delta.items()}, "reranked_users": reranked}
+        return changes
+
+
+class FileWatcher:
+    """Poll files for changes from a background thread and call on_change(changed_paths)."""
+
+    def __init__(self, paths, on_change, interval=1.0):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self.versions = {path: file_version(path) for path in self.paths}
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def poll(self):
+        """Check the files once; calls on_change when any of them changed.
+
+        The new versions are only recorded once on_change returns, so a
+        change it failed on (e.g. a half-written file) is retried next time.
+        """
+        versions = {path: file_version(path) for path in self.paths}
+        changed = [path for path in self.paths if versions[path] != self.versions[path]]
+        if changed:
+            self.on_change(changed)
+            self.versions = versions
+        return changed
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.warning("Applying a change of %s failed; retrying on the next poll", self.paths, exc_info=True)
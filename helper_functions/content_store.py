@@ -0,0 +1,243 @@
+from array import array
+from collections.abc import Mapping, Sequence
+import math
+
+import numpy as np
+
+from helper_functions.helper_functions import iter_json_array
+
+# Fields stored in dedicated columns; anything else is kept per item in extras.
+# Bit i of an item's field mask records whether CONTENT_FIELDS[i] is present.
+CONTENT_FIELDS = ('id', 'title', 'content', 'category', 'priority', 'tags')
+FIELD_BITS = {field: 1 << bit for bit, field in enumerate(CONTENT_FIELDS)}
+MISSING_CODE = -1
+
+# float32 keeps about 7 significant digits, so thresholds are rounded back on
+# read to give the values written in content.json (two decimals) exactly
+THRESHOLD_DIGITS = 6
+
+
+class StringColumn:
+    """Strings packed into one UTF-8 buffer with an offsets array."""
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        """Pack an iterable of strings into a column."""
+        buffer = bytearray()
+        offsets = array('q', [0])
+        for string in strings:
+            buffer += string.encode('utf-8')
+            offsets.append(len(buffer))
+        return cls(bytes(buffer), np.frombuffer(offsets, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return bytes(self.buffer[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes
+
+
+class ContentStore(Sequence):
+    """Columnar, dictionary-encoded view of content.json.
+
+    Every content item is a row; its tags live in shared tag columns addressed
+    through tag_offsets, so item i owns tags tag_offsets[i]:tag_offsets[i + 1].
+    Tag types, tag values and categories are codes into one string dictionary,
+    which stores each distinct string once.
+    """
+
+    def __init__(self, fields, ids, titles, texts, categories, priorities,
+                 tag_offsets, tag_types, tag_values, tag_thresholds, strings, extras=None):
+        self.fields = fields
+        self.ids = ids
+        self.titles = titles
+        self.texts = texts
+        self.categories = categories
+        self.priorities = priorities
+        self.tag_offsets = tag_offsets
+        self.tag_types = tag_types
+        self.tag_values = tag_values
+        self.tag_thresholds = tag_thresholds
+        self.strings = strings
+        self.extras = extras or {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a store from content dicts, consuming them one at a time."""
+        string_codes = {}
+        strings = []
+
+        def encode(string):
+            code = string_codes.get(string)
+            if code is None:
+                code = string_codes[string] = len(strings)
+                strings.append(string)
+            return code
+
+        fields = array('B')
+        ids, titles, texts = [], [], []
+        categories = array('i')
+        priorities = array('d')
+        tag_offsets = array('q', [0])
+        tag_types = array('i')
+        tag_values = array('i')
+        tag_thresholds = array('f')
+        extras = {}
+
+        for position, item in enumerate(records):
+            fields.append(sum(FIELD_BITS[field] for field in CONTENT_FIELDS if field in item))
+            ids.append(item.get('id', ''))
+            titles.append(item.get('title', ''))
+            texts.append(item.get('content', ''))
+            categories.append(encode(item['category']) if 'category' in item else MISSING_CODE)
+            priorities.append(item.get('priority', math.nan))
+            for tag in item.get('tags', []):
+                tag_types.append(encode(tag['type']))
+                tag_values.append(encode(tag['value']))
+                tag_thresholds.append(tag['threshold'] if 'threshold' in tag else math.nan)
+            tag_offsets.append(len(tag_types))
+
+            item_extras = {key: value for key, value in item.items() if key not in CONTENT_FIELDS}
+            if item_extras:
+                extras[position] = item_extras
+
+        return cls(
+            fields=np.frombuffer(fields, dtype=np.uint8),
+            ids=StringColumn.from_strings(ids),
+            titles=StringColumn.from_strings(titles),
+            texts=StringColumn.from_strings(texts),
+            categories=np.frombuffer(categories, dtype=np.int32),
+            priorities=np.frombuffer(priorities, dtype=np.float64),
+            tag_offsets=np.frombuffer(tag_offsets, dtype=np.int64),
+            tag_types=np.frombuffer(tag_types, dtype=np.int32),
+            tag_values=np.frombuffer(tag_values, dtype=np.int32),
+            tag_thresholds=np.frombuffer(tag_thresholds, dtype=np.float32),
+            strings=strings,
+            extras=extras
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("content position out of range")
+        return ContentRecord(self, position)
+
+    def __iter__(self):
+        return (ContentRecord(self, position) for position in range(len(self)))
+
+    def tags(self, position):
+        """Rebuild the tag dicts of one item."""
+        tags = []
+        for tag_position in range(self.tag_offsets[position], self.tag_offsets[position + 1]):
+            tag = {
+                "type": self.strings[self.tag_types[tag_position]],
+                "value": self.strings[self.tag_values[tag_position]]
+            }
+            threshold = self.tag_thresholds[tag_position]
+            if not math.isnan(threshold):
+                tag["threshold"] = round(float(threshold), THRESHOLD_DIGITS)
+            tags.append(tag)
+        return tags
+
+    def tag_index(self):
+        """Inverted (tag type, tag value) -> content positions index, built from the codes."""
+        if len(self.tag_types) == 0:
+            return {}
+        tag_counts = np.diff(self.tag_offsets)
+        tag_positions = np.repeat(np.arange(len(self), dtype=np.int64), tag_counts)
+        # Stable sort by (type, value) keeps each posting list in content order
+        order = np.lexsort((tag_positions, self.tag_values, self.tag_types))
+        types = self.tag_types[order]
+        values = self.tag_values[order]
+        positions = tag_positions[order]
+        boundaries = np.flatnonzero((np.diff(types) != 0) | (np.diff(values) != 0)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(order)]))
+
+        tag_index = {}
+        # Keys are inserted in order of first appearance, like build_tag_index
+        for start, end in sorted(zip(starts, ends), key=lambda bounds: order[bounds[0]]):
+            key = (self.strings[types[start]], self.strings[values[start]])
+            tag_index[key] = positions[start:end].tolist()
+        return tag_index
+
+    @property
+    def nbytes(self):
+        """Approximate resident size of the columns in bytes."""
+        arrays = (self.fields, self.categories, self.priorities, self.tag_offsets,
+                  self.tag_types, self.tag_values, self.tag_thresholds)
+        return (sum(column.nbytes for column in (self.ids, self.titles, self.texts))
+                + sum(column.nbytes for column in arrays)
+                + (self.strings.nbytes if isinstance(self.strings, StringColumn)
+                   else sum(len(string.encode('utf-8')) for string in self.strings)))
+
+
+class ContentRecord(Mapping):
+    """Read-only dict-like view of one row of a ContentStore."""
+
+    __slots__ = ('store', 'position')
+
+    def __init__(self, store, position):
+        self.store = store
+        self.position = position
+
+    def _keys(self):
+        store, position = self.store, self.position
+        fields = store.fields[position]
+        keys = [field for field in CONTENT_FIELDS if fields & FIELD_BITS[field]]
+        keys.extend(store.extras.get(position, ()))
+        return keys
+
+    def __getitem__(self, key):
+        store, position = self.store, self.position
+        if key not in self._keys():
+            raise KeyError(key)
+        if key == 'id':
+            return store.ids[position]
+        if key == 'title':
+            return store.titles[position]
+        if key == 'content':
+            return store.texts[position]
+        if key == 'category':
+            return store.strings[store.categories[position]]
+        if key == 'priority':
+            priority = float(store.priorities[position])
+            return int(priority) if priority.is_integer() else priority
+        if key == 'tags':
+            return store.tags(position)
+        return store.extras[position][key]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"ContentRecord({dict(self)!r})"
+
+
+def load_content_store(file_path):
+    """Stream a content JSON file straight into a ContentStore, or map a binary dataset."""
+    # Imported here: the binary format builds on the classes of this module
+    from helper_functions.binary_dataset import is_binary_dataset, open_binary_dataset
+
+    if is_binary_dataset(file_path):
+        return open_binary_dataset(file_path)
+    return ContentStore.from_records(iter_json_array(file_path))
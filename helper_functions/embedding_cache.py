@@ -0,0 +1,311 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from helper_functions.instrumentation import count
+
+EMBEDDINGS_FILE = 'embeddings.f32'
+KEYS_FILE = 'keys.bin'
+INDEX_FILE = 'index.json'
+# Keys are sha256 hex digests, stored fixed-width in row order
+KEY_WIDTH = 64
+
+
+def embedding_key(model_name, text):
+    """Cache key of one text embedded by one model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+
+def write_json_atomic(file_path, data):
+    """Write JSON to a temporary file and move it into place."""
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, 'w') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, file_path)
+
+
+def append_synced(file_path, data, size):
+    """Truncate a file to size bytes, append data and flush it to disk."""
+    with open(file_path, 'ab') as file:
+        file.truncate(size)
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class EmbeddingCache:
+    """On-disk embedding cache: a memory-mapped float32 matrix plus a log of its row keys.
+
+    index.json only holds the model name and dimension and is written when
+    the cache is (re)started. Each append adds the new rows to the matrix and
+    then their keys to the fixed-width key log, so its cost does not grow with
+    the cache. Row i holds the embedding of key i; keys without a row on disk
+    and rows without a key (from an interrupted append) are ignored and
+    overwritten by the next append, so an interrupted run leaves a usable
+    cache.
+    """
+
+    def __init__(self, cache_dir, model_name):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.embeddings_path = os.path.join(cache_dir, EMBEDDINGS_FILE)
+        self.keys_path = os.path.join(cache_dir, KEYS_FILE)
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.dimension = None
+        self.rows = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+            # A cache written for another model is ignored and overwritten
+            if index.get('model_name') == model_name:
+                self.dimension = index['dimension']
+                if 'rows' in index:
+                    self._migrate_index(index['rows'])
+                self.rows = self._read_rows()
+        self.matrix = self._open_matrix()
+
+    def _migrate_index(self, rows):
+        """Move the key -> row map of an index.json written by older versions into the key log."""
+        keys = sorted(rows, key=rows.get)
+        with open(self.keys_path, 'wb') as file:
+            file.write(np.array(keys, dtype=f'S{KEY_WIDTH}').tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        write_json_atomic(self.index_path, {"model_name": self.model_name, "dimension": self.dimension})
+
+    def _read_rows(self):
+        """key -> row of every key logged with its row on disk."""
+        if not os.path.exists(self.keys_path) or not os.path.exists(self.embeddings_path):
+            return {}
+        row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        with open(self.keys_path, 'rb') as file:
+            data = file.read()
+        row_count = min(len(data) // KEY_WIDTH, os.path.getsize(self.embeddings_path) // row_bytes)
+        keys = np.frombuffer(data, dtype=f'S{KEY_WIDTH}', count=row_count)
+        return {key.decode('ascii'): row for row, key in enumerate(keys)}
+
+    def _open_matrix(self):
+        if self.dimension is None or not self.rows:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return np.memmap(self.embeddings_path, dtype=np.float32, mode='r', shape=(len(self.rows), self.dimension))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, text):
+        return embedding_key(self.model_name, text) in self.rows
+
+    def encode(self, texts, encode_fn):
+        """Embed texts, calling encode_fn only for texts missing from the cache."""
+        keys = [embedding_key(self.model_name, text) for text in texts]
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+        if missing:
+            self._append(list(missing), encode_fn(list(missing.values())))
+        if keys:
+            count("embedding_cache.hits", len(keys) - len(missing))
+            count("embedding_cache.misses", len(missing))
+
+        if not keys:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return np.asarray(self.matrix[[self.rows[key] for key in keys]], dtype=np.float32)
+
+    def mapped_rows(self, texts):
+        """Memory-mapped view of the cached embeddings of texts, indexed by position in texts."""
+        rows = np.array([self.rows[embedding_key(self.model_name, text)] for text in texts], dtype=np.int64)
+        return MappedRows(self.matrix, rows)
+
+    def _append(self, keys, embeddings):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.dimension is None or not self.rows:
+            # First write (or a model change): start a fresh matrix and key log
+            self.dimension = embeddings.shape[1]
+            self.rows = {}
+            write_json_atomic(self.index_path, {"model_name": self.model_name, "dimension": self.dimension})
+        elif embeddings.shape[1] != self.dimension:
+            raise ValueError(f"Expected embeddings of dimension {self.dimension}, got {embeddings.shape[1]}")
+
+        # Rows go to disk before the keys that point to them; truncating first
+        # drops whatever an interrupted append left past the last logged row
+        first_row = len(self.rows)
+        append_synced(self.embeddings_path, embeddings.tobytes(), first_row * self.dimension * embeddings.itemsize)
+        append_synced(self.keys_path, np.array(keys, dtype=f'S{KEY_WIDTH}').tobytes(), first_row * KEY_WIDTH)
+
+        for offset, key in enumerate(keys):
+            self.rows[key] = first_row + offset
+        self.matrix = self._open_matrix()
+
+
+class MappedRows:
+    """Rows of a memory-mapped matrix in a caller-defined order; only indexed rows are read."""
+
+    def __init__(self, matrix, rows):
+        self.matrix = matrix
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, positions):
+        return np.asarray(self.matrix[self.rows[positions]], dtype=np.float32)
+
+
+class LRUEmbeddingCache:
+    """Bounded in-memory text -> embedding cache shared by every caller in the process."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def encode(self, texts, encode_fn):
+        """Embed texts, calling encode_fn only for texts not currently cached."""
+        texts = list(texts)
+        found = {}
+        with self.lock:
+            for text in texts:
+                if text in self.entries:
+                    self.entries.move_to_end(text)
+                    found[text] = self.entries[text]
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            embeddings = np.asarray(encode_fn(missing))
+            # Copy rows so evicting an entry frees its memory
+            found.update((text, embedding.copy()) for text, embedding in zip(missing, embeddings))
+
+        if texts:
+            count("interest_cache.hits", len(texts) - len(missing))
+            count("interest_cache.misses", len(missing))
+        with self.lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            for text in missing:
+                self.entries[text] = found[text]
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.array([found[text] for text in texts])
+
+
+class UserEmbeddingStore:
+    """Persisted per-user sum and count of interest embeddings.
+
+    The user embedding is the mean sum / count, so adding or removing one
+    interest only encodes that interest. A store written for another model is
+    ignored, like EmbeddingCache, and save() only writes after a change. The
+    store can be shared between threads.
+    """
+
+    def __init__(self, file_path, model_name=None):
+        self.file_path = file_path
+        self.model_name = model_name
+        self.users = {}
+        self.lock = threading.RLock()
+        self.dirty = False
+        if os.path.exists(file_path):
+            with np.load(file_path, allow_pickle=False) as data:
+                stored_model = str(data['model_name']) if 'model_name' in data.files else ''
+                if stored_model == (model_name or ''):
+                    for name, values, count, total in zip(data['names'], data['values'], data['counts'], data['sums']):
+                        self.users[str(name)] = {"values": json.loads(str(values)), "count": int(count), "sum": total}
+
+    def __contains__(self, user_id):
+        return user_id in self.users
+
+    def embedding(self, user_id, interest_values, encode_fn):
+        """Mean embedding of the user's interests, applying only the changes since the last call."""
+        if not interest_values:
+            raise ValueError(f"User {user_id} has no interests to embed")
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                embeddings = np.asarray(encode_fn(list(interest_values)), dtype=np.float64)
+                entry = self.users[user_id] = {
+                    "values": list(interest_values),
+                    "count": len(interest_values),
+                    "sum": embeddings.sum(axis=0)
+                }
+                self.dirty = True
+            else:
+                remaining = list(entry["values"])
+                added = []
+                for value in interest_values:
+                    if value in remaining:
+                        remaining.remove(value)
+                    else:
+                        added.append(value)
+                # Adding first keeps the user alive when every interest is replaced
+                if added:
+                    self.add_interests(user_id, added, encode_fn)
+                if remaining:
+                    self.remove_interests(user_id, remaining, encode_fn)
+            return entry["sum"] / entry["count"]
+
+    def add_interests(self, user_id, interest_values, encode_fn):
+        """Add interests to a stored user."""
+        with self.lock:
+            entry = self.users[user_id]
+            embeddings = np.asarray(encode_fn(list(interest_values)), dtype=np.float64)
+            entry["sum"] = entry["sum"] + embeddings.sum(axis=0)
+            entry["count"] += len(interest_values)
+            entry["values"].extend(interest_values)
+            self.dirty = True
+
+    def remove_interests(self, user_id, interest_values, encode_fn):
+        """Remove interests from a stored user; the user is dropped once none are left."""
+        with self.lock:
+            entry = self.users[user_id]
+            self.dirty = True
+            for value in interest_values:
+                entry["values"].remove(value)
+            if not entry["values"]:
+                del self.users[user_id]
+                return
+            embeddings = np.asarray(encode_fn(list(interest_values)), dtype=np.float64)
+            entry["sum"] = entry["sum"] - embeddings.sum(axis=0)
+            entry["count"] -= len(interest_values)
+
+    def save(self):
+        """Write the store to disk atomically, if it changed since it was loaded or last saved."""
+        with self.lock:
+            if not self.dirty:
+                return False
+            names = list(self.users)
+            dimension = len(next(iter(self.users.values()))["sum"]) if names else 0
+            os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+            temporary_path = f"{self.file_path}.tmp.npz"
+            np.savez(
+                temporary_path,
+                model_name=np.array(self.model_name or '', dtype=str),
+                names=np.array(names, dtype=str),
+                values=np.array([json.dumps(self.users[name]["values"]) for name in names], dtype=str),
+                counts=np.array([self.users[name]["count"] for name in names], dtype=np.int64),
+                sums=np.array([self.users[name]["sum"] for name in names], dtype=np.float64).reshape(len(names), dimension)
+            )
+            os.replace(temporary_path, self.file_path)
+            self.dirty = False
+            return True
@@ -1,83 +1,370 @@
+from collections.abc import Sequence
+import functools
+import hashlib
+import heapq
 import json
+import os
+import re
 
-# Load users and content from JSON files
-def load_data():
-    with open('users.json', 'r') as f:
-        users = json.load(f)
-    with open('content.json', 'r') as f:
+import numpy as np
+
+from helper_functions.instrumentation import timed
+
+# Whitespace allowed between JSON tokens
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that can continue a JSON number
+JSON_NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+
+
+# Yield the records of a top-level JSON array one at a time. Only the current
+# record and at most a couple of read chunks are held in memory, whatever the
+# size of the file.
+def iter_json_array(file_path, chunk_size=65536):
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buffer = ''
+        position = 0
+        expecting = '['
+        while True:
+            position = JSON_WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"Unexpected end of JSON array in {file_path}")
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            char = buffer[position]
+            if expecting == '[':
+                if char != '[':
+                    raise ValueError(f"Expected a top-level JSON array in {file_path}")
+                position += 1
+                expecting = 'first'
+            elif char == ']' and expecting in ('first', 'separator'):
+                return
+            elif expecting == 'separator':
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' at offset {position} in {file_path}")
+                position += 1
+                expecting = 'record'
+            else:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    end = None
+                # A record cut off by the chunk boundary (or a scalar that may
+                # continue in the next chunk, like 1.5 of 1.5e3) is decoded
+                # again with more data
+                is_number = end is not None and isinstance(record, (int, float)) and not isinstance(record, bool)
+                if end is None or end == len(buffer) or (is_number and JSON_NUMBER_TAIL.fullmatch(buffer, end)):
+                    chunk = f.read(chunk_size)
+                    if chunk:
+                        buffer = buffer[position:] + chunk
+                        position = 0
+                        continue
+                    if end is None:
+                        raise ValueError(f"Invalid JSON record at offset {position} in {file_path}")
+                yield record
+                position = end
+                expecting = 'separator'
+
+            # Drop what has been consumed so the buffer stays bounded
+            if position > chunk_size:
+                buffer = buffer[position:]
+                position = 0
+
+
+# Hash of a file's content at a given version (path, mtime, size)
+@functools.lru_cache(maxsize=64)
+def hash_file_version(file_path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Content hash of a file, only re-read when its size or modification time
+# changes. Used to key caches that must be invalidated when the data changes.
+def file_content_hash(file_path):
+    stat = os.stat(file_path)
+    return hash_file_version(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+# Load users and content from JSON files. With stream=True both are returned as
+# generators that parse the files lazily, one record at a time. Content in the
+# binary dataset format (see binary_dataset.py) is memory-mapped instead of
+# parsed, in both modes.
+@timed()
+def load_data(stream=False, content_path='content.json'):
+    from helper_functions.binary_dataset import is_binary_dataset, open_binary_dataset
+
+    if stream:
+        users = iter_json_array('users.json')
+    else:
+        with open('users.json', 'r') as f:
+            users = json.load(f)
+    if is_binary_dataset(content_path):
+        return users, open_binary_dataset(content_path)
+    if stream:
+        return users, iter_json_array(content_path)
+    with open(content_path, 'r') as f:
         content = json.load(f)
     return users, content
 
+# Build an inverted index mapping each (tag type, tag value) to the positions
+# of the content items carrying it. Positions are appended in content order, so
+# every posting list is already sorted.
+@timed()
+def build_tag_index(content):
+    # Columnar stores build the index from their encoded tag columns
+    if hasattr(content, 'tag_index'):
+        return content.tag_index()
+    tag_index = {}
+    for position, item in enumerate(content):
+        for tag in item.get('tags', []):
+            tag_index.setdefault((tag['type'], tag['value']), []).append(position)
+    return tag_index
+
+
+# Distinct (type, value) pairs of a user's interests
+def interest_keys(user_interests):
+    return {(interest['type'], interest['value']) for interest in user_interests}
+
+
+# Positions of the content items whose tags match any of the user's interests.
+# An item is reported once per matching tag, exactly like the nested scan.
+def match_country_positions(user_interests, tag_index):
+    postings = [tag_index[key] for key in interest_keys(user_interests) if key in tag_index]
+    return list(heapq.merge(*postings))
+
+
 # Match content with user interests
-def match_country_content(users, content):
+@timed()
+def match_country_content(users, content, tag_index=None):
+    # Content is indexed once and shared by every user
+    if not isinstance(content, Sequence):
+        content = list(content)
+    if tag_index is None:
+        tag_index = build_tag_index(content)
+
     user_content = {}
     for user in users:
-        relevant_content = []
-        user_interests = user['interests']
-
-        for item in content:
-            # Check if the content has tags
-            if 'tags' in item:
-                for tag in item['tags']:
-                    # Match based on same interest type and country
-                    for interest in user_interests:
-                        # Check if the interest is a country and matches the tag
-                        if (interest['type'] == 'country' and
-                                tag['type'] == 'country' and
-                                tag['value'] == interest['value']):
-                            relevant_content.append(item)
-                            break  # Stop checking other interests for this item
-                        # Check if the interest is of another type and matches the tag
-                        elif (interest['type'] != 'country' and
-                                tag['type'] == interest['type'] and
-                                tag['value'] == interest['value']):
-                            relevant_content.append(item)
-                            break  # Stop checking other interests for this item
-        user_content[user['name']] = relevant_content
+        positions = match_country_positions(user['interests'], tag_index)
+        user_content[user['name']] = [content[position] for position in positions]
     return user_content
 
 
+# Turn every posting list into a bitmap stored as a Python int, where bit i is
+# set when content position i carries the tag
+def build_tag_bitmaps(tag_index, content_size):
+    tag_bitmaps = {}
+    for key, positions in tag_index.items():
+        bits = bytearray((content_size + 7) // 8)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        tag_bitmaps[key] = int.from_bytes(bits, 'little')
+    return tag_bitmaps
+
+
+# Positions of the set bits in ascending order. The int is unpacked to bytes
+# once and decoded with NumPy: clearing bits one at a time would copy the
+# whole big int per set bit.
+def iter_bitmap_positions(bitmap):
+    if not bitmap:
+        return []
+    bits = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(bits, bitorder='little')).tolist()
+
+
+# Bitmap of the content items matching a country interest AND at least one
+# other interest of the user
+def match_country_and_bitmap(user_interests, tag_bitmaps):
+    country_bitmap = 0
+    other_interests_bitmap = 0
+    for key in interest_keys(user_interests):
+        bitmap = tag_bitmaps.get(key, 0)
+        if key[0] == 'country':
+            country_bitmap |= bitmap
+        else:
+            other_interests_bitmap |= bitmap
+    return country_bitmap & other_interests_bitmap
+
+
 # Match content with user interests
-def match_country_and_content(users, content):
+@timed()
+def match_country_and_content(users, content, tag_bitmaps=None):
+    # Content is indexed once and shared by every user
+    if not isinstance(content, Sequence):
+        content = list(content)
+    if tag_bitmaps is None:
+        tag_bitmaps = build_tag_bitmaps(build_tag_index(content), len(content))
+
     user_content = {}
     for user in users:
-        relevant_content = []
-        user_interests = user['interests']
-
-        # Initialize flags for matching conditions
-        country_match = False
-        other_interests_match = False
-
-        for item in content:
-            # Check if the content has tags
-            if 'tags' in item:
-                # Reset flags for each content item
-                country_match = False
-                other_interests_match = False
-
-                # Check for country interest matches
-                for interest in user_interests:
-                    if interest['type'] == 'country':
-                        for tag in item['tags']:
-                            if tag['type'] == 'country' and tag['value'] == interest['value']:
-                                country_match = True
-                                break  # Stop checking tags for country match
-                    if country_match:
-                        break  # Stop checking interests if country match is found
-
-                # Check for other types of interest matches
-                for interest in user_interests:
-                    if interest['type'] != 'country':
-                        for tag in item['tags']:
-                            if tag['type'] == interest['type'] and tag['value'] == interest['value']:
-                                other_interests_match = True
-                                break  # Stop checking tags for other interest match
-                    if other_interests_match:
-                        break  # Stop checking interests if other match is found
-
-                # Only add content if both conditions are met
-                if country_match and other_interests_match:
-                    relevant_content.append(item)
-
-        user_content[user['name']] = relevant_content
+        bitmap = match_country_and_bitmap(user['interests'], tag_bitmaps)
+        user_content[user['name']] = [content[position] for position in iter_bitmap_positions(bitmap)]
     return user_content
+
+
+# Assign a column to every (tag type, tag value) in the index
+def build_tag_vocabulary(tag_index):
+    return {key: column for column, key in enumerate(tag_index)}
+
+
+# Sparse tag x content incidence matrix. Entries count how many times an item
+# carries a tag, which keeps the once-per-matching-tag semantics of
+# match_country_content.
+def build_content_matrix(tag_index, content_size, vocabulary):
+    from scipy import sparse
+
+    rows = []
+    columns = []
+    for key, positions in tag_index.items():
+        rows.extend([vocabulary[key]] * len(positions))
+        columns.extend(positions)
+    data = np.ones(len(rows), dtype=np.int32)
+    # Duplicate (row, column) pairs are summed by the CSR conversion
+    return sparse.csr_matrix((data, (rows, columns)), shape=(len(vocabulary), content_size))
+
+
+# Sparse binary user x tag matrix. Only interests accepted by keep_interest are
+# encoded, and interests outside the vocabulary can never match anything.
+def build_user_matrix(users, vocabulary, keep_interest=lambda interest: True):
+    from scipy import sparse
+
+    rows = []
+    columns = []
+    for row, user in enumerate(users):
+        keys = interest_keys(interest for interest in user['interests'] if keep_interest(interest))
+        for key in keys:
+            if key in vocabulary:
+                rows.append(row)
+                columns.append(vocabulary[key])
+    data = np.ones(len(rows), dtype=np.int32)
+    return sparse.csr_matrix((data, (rows, columns)), shape=(len(users), len(vocabulary)))
+
+
+# Batch mode of match_country_content (require_country=False) and
+# match_country_and_content (require_country=True) for every user at once
+@timed()
+def match_all_users(users, content, require_country=False, tag_index=None):
+    # SciPy is only needed by the batch path, keep it off the import path
+    from scipy import sparse
+
+    if not isinstance(users, list):
+        users = list(users)
+    if not isinstance(content, Sequence):
+        content = list(content)
+    if tag_index is None:
+        tag_index = build_tag_index(content)
+
+    vocabulary = build_tag_vocabulary(tag_index)
+    content_matrix = build_content_matrix(tag_index, len(content), vocabulary)
+
+    if require_country:
+        # Stack the country and other-interest halves so a single product
+        # yields both match counts
+        user_matrix = sparse.vstack([
+            build_user_matrix(users, vocabulary, lambda interest: interest['type'] == 'country'),
+            build_user_matrix(users, vocabulary, lambda interest: interest['type'] != 'country')
+        ]).tocsr()
+        product = user_matrix @ content_matrix
+        country_matches = product[:len(users)]
+        other_interests_matches = product[len(users):]
+        matches = country_matches.multiply(other_interests_matches).tocsr()
+        matches.data[:] = 1
+    else:
+        matches = build_user_matrix(users, vocabulary) @ content_matrix
+
+    matches.eliminate_zeros()
+    matches.sort_indices()
+
+    user_content = {}
+    for row, user in enumerate(users):
+        start, end = matches.indptr[row], matches.indptr[row + 1]
+        positions = np.repeat(matches.indices[start:end], matches.data[start:end])
+        user_content[user['name']] = [content[position] for position in positions]
+    return user_content
+
+
+# Lowest threshold of each (type, value) interest of a user; interests without
+# a threshold accept any tag
+def interest_thresholds(user_interests):
+    thresholds = {}
+    for interest in user_interests:
+        key = (interest['type'], interest['value'])
+        threshold = interest.get('threshold') or 0.0
+        thresholds[key] = min(threshold, thresholds.get(key, threshold))
+    return thresholds
+
+
+# Score of one content item for a user, or None when it does not qualify. A
+# tag matches an interest with the same type and value, as in the other
+# matchers, so thresholds only affect the order: items are ranked by number
+# of matched tags, then the number of those whose threshold (1.0 when
+# missing) reaches the interest's threshold, then the sum of the matched tag
+# thresholds, then priority.
+def score_content(item, thresholds, require_country=False):
+    matched = 0
+    reached = 0
+    threshold_sum = 0.0
+    country_matched = False
+    other_matched = False
+    for tag in item.get('tags', []):
+        key = (tag['type'], tag['value'])
+        if key not in thresholds:
+            continue
+        tag_threshold = tag.get('threshold', 1.0)
+        matched += 1
+        if tag_threshold >= thresholds[key]:
+            reached += 1
+        threshold_sum += tag_threshold
+        if key[0] == 'country':
+            country_matched = True
+        else:
+            other_matched = True
+    if not matched or (require_country and not (country_matched and other_matched)):
+        return None
+    return (matched, reached, round(threshold_sum, 6), item.get('priority') or 0)
+
+
+# Yield the top_n best scoring (item, score) pairs for a user, best first.
+# Candidates come from the posting lists of the user's interests, and only the
+# best top_n are kept in a bounded min-heap, so a user costs
+# O(matches * log(top_n)) and full match lists are never built. Ties keep
+# content order.
+def rank_content(user_interests, content, tag_index, top_n, require_country=False):
+    thresholds = interest_thresholds(user_interests)
+    candidates = set()
+    for key in thresholds:
+        candidates.update(tag_index.get(key, ()))
+
+    heap = []
+    for position in candidates:
+        score = score_content(content[position], thresholds, require_country)
+        if score is None:
+            continue
+        # Smallest entry is the worst kept match: lowest score, latest position
+        entry = (score, -position)
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    for score, negative_position in sorted(heap, reverse=True):
+        yield content[-negative_position], score
+
+
+# Ranked top-N matches of every user, as {user_name: [(item, score), ...]}
+@timed()
+def rank_all_users(users, content, top_n, require_country=False, tag_index=None):
+    if not isinstance(content, Sequence):
+        content = list(content)
+    if tag_index is None:
+        tag_index = build_tag_index(content)
+    return {
+        user['name']: list(rank_content(user['interests'], content, tag_index, top_n, require_country))
+        for user in users
+    }
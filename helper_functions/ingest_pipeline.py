@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+
+from helper_functions import instrumentation
+
+# Marks the end of the batches flowing between two stages
+END = object()
+
+# How often blocked stages check whether another stage failed
+POLL_INTERVAL = 0.1
+
+
+class StageStats:
+    """Throughput counters of one pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.wait_input_seconds = 0.0
+        self.wait_output_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "batches": self.batches,
+            "items": self.items,
+            "busy_s": round(self.busy_seconds, 4),
+            "wait_input_s": round(self.wait_input_seconds, 4),
+            "wait_output_s": round(self.wait_output_seconds, 4),
+            "items_per_s": round(self.items / self.busy_seconds, 1) if self.busy_seconds else None
+        }
+
+
+class Pipeline:
+    """Run a batch source and processing stages concurrently, one thread each.
+
+    Stages are connected by bounded queues, so a slow stage makes the stages
+    before it block (backpressure) instead of buffering the whole input, and
+    the total time approaches that of the slowest stage. The first exception
+    raised by any stage stops the pipeline and is re-raised by run().
+    """
+
+    def __init__(self, queue_size=4, count=len):
+        self.queue_size = queue_size
+        self.count = count
+        self.stop = threading.Event()
+        self.error = None
+
+    def run(self, source, stages, source_name='source'):
+        """Feed the batches of source through stages, a list of (name, function) pairs.
+
+        Every function takes a batch and returns the batch for the next stage;
+        the results of the last stage are discarded. Returns the per-stage
+        counters, source first.
+        """
+        stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stages]
+        # Spans and counters of the stage threads go to the caller's collectors
+        guard = instrumentation.propagate(self._guard)
+        threads = [threading.Thread(target=guard, args=(self._produce, source, queues[0], stats[0]),
+                                    name=f"pipeline-{source_name}", daemon=True)]
+        for position, (name, function) in enumerate(stages):
+            output = queues[position + 1] if position + 1 < len(queues) else None
+            threads.append(threading.Thread(
+                target=guard, args=(self._process, function, queues[position], output, stats[position + 1]),
+                name=f"pipeline-{name}", daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+        return [stage.as_dict() for stage in stats]
+
+    def _guard(self, target, *args):
+        try:
+            target(*args)
+        except BaseException as error:
+            if self.error is None:
+                self.error = error
+            self.stop.set()
+
+    def _put(self, output, batch, stage):
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                output.put(batch, timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        stage.wait_output_seconds += time.perf_counter() - started
+
+    def _get(self, input_queue, stage):
+        started = time.perf_counter()
+        try:
+            while not self.stop.is_set():
+                try:
+                    return input_queue.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return END
+        finally:
+            stage.wait_input_seconds += time.perf_counter() - started
+
+    def _produce(self, source, output, stage):
+        batches = iter(source)
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            batch = next(batches, END)
+            stage.busy_seconds += time.perf_counter() - started
+            if batch is END:
+                break
+            stage.batches += 1
+            stage.items += self.count(batch)
+            self._put(output, batch, stage)
+        self._put(output, END, stage)
+
+    def _process(self, function, input_queue, output, stage):
+        while True:
+            batch = self._get(input_queue, stage)
+            if batch is END:
+                break
+            started = time.perf_counter()
+            result = function(batch)
+            stage.busy_seconds += time.perf_counter() - started
+            stage.batches += 1
+            stage.items += self.count(batch)
+            if output is not None:
+                self._put(output, result, stage)
+        if output is not None:
+            self._put(output, END, stage)
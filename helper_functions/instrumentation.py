@@ -0,0 +1,175 @@
+from contextlib import contextmanager
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+# Timing spans and counters are recorded only when INSTRUMENTATION is set to
+# a true value (or after enable()); otherwise span() returns a shared no-op
+# context manager and functions decorated with timed() only check the flag, so
+# the hot paths pay (almost) nothing.
+ENABLED = os.environ.get('INSTRUMENTATION', '').lower() in ('1', 'true', 'yes', 'on')
+
+logger = logging.getLogger('instrumentation')
+
+# Collectors of the records emitted by each thread, innermost last. Threads
+# started through propagate() report to the collectors of their parent.
+_local = threading.local()
+
+
+def enable(enabled=True):
+    """Switch recording on or off at runtime, including for functions already decorated."""
+    global ENABLED
+    ENABLED = enabled
+    if enabled and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def emit(record):
+    """Log one record as a JSON line and hand it to the thread's active collectors."""
+    logger.info(json.dumps(record, default=str))
+    for records in getattr(_local, 'collectors', ()):
+        records.append(record)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Time the enclosed block; extra fields can be attached with set() while it runs."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record = {
+            "type": "span",
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "thread": threading.current_thread().name
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record.update(self.fields)
+        emit(record)
+        return False
+
+
+def span(name, **fields):
+    """Context manager timing one stage, e.g. `with span("model.encode", texts=len(texts)):`."""
+    if not ENABLED:
+        return NOOP_SPAN
+    return Span(name, fields)
+
+
+def count(name, value=1, **fields):
+    """Record a counter increment."""
+    if ENABLED:
+        emit({"type": "counter", "name": name, "value": value, **fields})
+
+
+def timed(name=None):
+    """Decorator wrapping every call of a function in a span named after it, while recording is on."""
+    def decorate(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with Span(span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect():
+    """Gather the records emitted by this thread inside the block, e.g. one Streamlit rerun."""
+    records = []
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(records)
+    try:
+        yield records
+    finally:
+        collectors.remove(records)
+
+
+def propagate(function):
+    """Wrap a function so the thread running it reports to the calling thread's collectors.
+
+    Used for the target of worker threads (e.g. the Pipeline stages), so their
+    records reach the collect() block that started them.
+    """
+    parent_collectors = list(getattr(_local, 'collectors', ()))
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        collectors = getattr(_local, 'collectors', None)
+        if collectors is None:
+            collectors = _local.collectors = []
+        collectors.extend(parent_collectors)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            for records in parent_collectors:
+                collectors.remove(records)
+    return wrapper
+
+
+def summarize(records):
+    """Per-name totals of collected records: calls and total milliseconds, or counter sums."""
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(record["name"], {"calls": 0, "total_ms": 0.0, "count": 0})
+        if record["type"] == "span":
+            entry["calls"] += 1
+            entry["total_ms"] += record["duration_ms"]
+        else:
+            entry["count"] += record["value"]
+    return summary
+
+
+def render_sidebar(st, records):
+    """Show a per-stage breakdown of one rerun in the Streamlit sidebar."""
+    summary = summarize(records)
+    st.sidebar.subheader("Timings (this rerun)")
+    if not summary:
+        st.sidebar.write("No instrumented stage ran (cached).")
+        return
+    rows = [
+        {"stage": name, "calls": entry["calls"], "total ms": round(entry["total_ms"], 2), "count": entry["count"]}
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]["total_ms"])
+    ]
+    st.sidebar.table(rows)
+
+
+if ENABLED:
+    enable()
@@ -0,0 +1,109 @@
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+
+from helper_functions.helper_functions import (
+    build_tag_index,
+    build_tag_bitmaps,
+    match_country_positions,
+    match_country_and_bitmap,
+    iter_bitmap_positions
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Index built by each worker process once, in its initializer, and reused by
+# every shard the worker matches
+_worker_index = None
+
+
+def iter_shards(users, chunk_size):
+    """Split users into consecutive lists of at most chunk_size users."""
+    users = iter(users)
+    while True:
+        shard = list(islice(users, chunk_size))
+        if not shard:
+            return
+        yield shard
+
+
+def build_match_index(tag_index, content_size, require_country):
+    """Index match_shard reads: tag bitmaps with require_country, else the tag index."""
+    return build_tag_bitmaps(tag_index, content_size) if require_country else tag_index
+
+
+def init_worker(tag_index, content_size, require_country):
+    """Install the shared content index in a worker process."""
+    global _worker_index
+    _worker_index = build_match_index(tag_index, content_size, require_country)
+
+
+def match_shard(shard, require_country, index=None):
+    """(user name, matched content positions) for every user of a shard, in shard order.
+
+    index defaults to the one init_worker installed in this worker process.
+    """
+    if index is None:
+        index = _worker_index
+    if require_country:
+        return [
+            (user['name'], list(iter_bitmap_positions(match_country_and_bitmap(user['interests'], index))))
+            for user in shard
+        ]
+    return [(user['name'], match_country_positions(user['interests'], index)) for user in shard]
+
+
+def parallel_match_content(users, content, require_country=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, tag_index=None):
+    """Parallel match_country_content (or match_country_and_content with require_country).
+
+    Users are matched in shards of chunk_size by a pool of worker processes.
+    Each worker receives the tag index once, when it starts, instead of the
+    content being pickled with every shard, and only returns content
+    positions. Shards are merged in input order, so the result is the same
+    {user_name: [items]} mapping as the serial matchers whatever the number
+    of workers.
+    """
+    if not isinstance(content, Sequence):
+        content = list(content)
+    if tag_index is None:
+        tag_index = build_tag_index(content)
+    workers = workers or os.cpu_count() or 1
+    shards = iter_shards(users, chunk_size)
+
+    if workers == 1:
+        # No pool to start: match in this process with the same code path,
+        # passing the index instead of leaving it in the module global
+        index = build_match_index(tag_index, len(content), require_country)
+        shard_results = (match_shard(shard, require_country, index) for shard in shards)
+        return merge_shard_results(shard_results, content)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(tag_index, len(content), require_country)) as executor:
+        shard_results = iter_pool_results(executor, shards, require_country, max_pending=2 * workers)
+        return merge_shard_results(shard_results, content)
+
+
+def iter_pool_results(executor, shards, require_country, max_pending):
+    """Submit shards as results are consumed and yield the results in submission order.
+
+    At most max_pending shards are queued at once, so users can be streamed
+    from a generator without being read up front.
+    """
+    pending = deque()
+    for shard in shards:
+        pending.append(executor.submit(match_shard, shard, require_country))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def merge_shard_results(shard_results, content):
+    """Resolve positions to content items, keeping users in input order."""
+    user_content = {}
+    for results in shard_results:
+        for name, positions in results:
+            user_content[name] = [content[position] for position in positions]
+    return user_content
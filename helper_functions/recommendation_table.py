@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+
+# File layout: MAGIC | header length (uint64, little-endian) | JSON header |
+# rows. The header holds the row dtype and count and the versions of the data
+# the table was computed from; rows start on a 64-byte boundary so they can be
+# memory-mapped in place.
+MAGIC = b'RECTAB\x00\x01'
+HEADER_LENGTH = np.dtype('<u8')
+ALIGNMENT = 64
+
+
+def data_offset(header_length):
+    return -(-(len(MAGIC) + HEADER_LENGTH.itemsize + header_length) // ALIGNMENT) * ALIGNMENT
+
+
+def table_dtype(name_width, id_width, top_n):
+    """Fixed-width record of one user's precomputed recommendations."""
+    return np.dtype([
+        ('name', f'U{max(name_width, 1)}'),
+        ('count', np.int32),
+        ('ids', f'U{max(id_width, 1)}', (top_n,)),
+        ('distances', np.float32, (top_n,))
+    ])
+
+
+def build_recommendation_table(user_recommendations, top_n):
+    """Pack name -> Chroma-shaped results into a structured array, one row per user."""
+    names = list(user_recommendations)
+    name_width = max((len(name) for name in names), default=1)
+    id_width = max((len(doc_id) for results in user_recommendations.values() for doc_id in results['ids'][0]), default=1)
+
+    table = np.zeros(len(names), dtype=table_dtype(name_width, id_width, top_n))
+    table['distances'] = np.inf
+    for row, name in enumerate(names):
+        ids = user_recommendations[name]['ids'][0][:top_n]
+        table[row]['name'] = name
+        table[row]['count'] = len(ids)
+        table[row]['ids'][:len(ids)] = ids
+        table[row]['distances'][:len(ids)] = user_recommendations[name]['distances'][0][:len(ids)]
+    return table
+
+
+def write_recommendation_table(file_path, table, corpus_fingerprint=None, users_hash=None):
+    """Write the table next to its destination and move it into place.
+
+    corpus_fingerprint and users_hash identify the content and users the
+    table was computed from, so readers can tell when it is stale. Readers
+    either keep the previous file (already opened or mapped) or see the
+    complete new one, never a partial write.
+    """
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    header = json.dumps({
+        "descr": np.lib.format.dtype_to_descr(table.dtype),
+        "rows": len(table),
+        "corpus_fingerprint": corpus_fingerprint,
+        "users_hash": users_hash
+    }).encode('utf-8')
+    temporary_path = f"{file_path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array(len(header), dtype=HEADER_LENGTH).tobytes())
+        file.write(header)
+        file.seek(data_offset(len(header)))
+        file.write(np.ascontiguousarray(table).tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, file_path)
+
+
+def read_table_header(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{file.name} is not a recommendation table")
+    header_length = int(np.frombuffer(file.read(HEADER_LENGTH.itemsize), dtype=HEADER_LENGTH)[0])
+    return json.loads(file.read(header_length)), data_offset(header_length)
+
+
+class RecommendationTable:
+    """Memory-mapped recommendation table with an O(1) user name -> row lookup."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            header, offset = read_table_header(file)
+        dtype = np.lib.format.descr_to_dtype([tuple(field) for field in header["descr"]])
+        if header["rows"]:
+            self.table = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(header["rows"],))
+        else:
+            self.table = np.zeros(0, dtype=dtype)
+        self.corpus_fingerprint = header["corpus_fingerprint"]
+        self.users_hash = header["users_hash"]
+        self.rows = {str(name): row for row, name in enumerate(self.table['name'])}
+        self.top_n = self.table.dtype['ids'].shape[0]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def is_current(self, corpus_fingerprint, users_hash):
+        """Whether the table was computed from this content and users file."""
+        return self.corpus_fingerprint == corpus_fingerprint and self.users_hash == users_hash
+
+    def recommendations(self, name, top_n=None):
+        """Chroma-shaped ids and distances of one user, or None for an unknown user."""
+        row = self.rows.get(name)
+        if row is None:
+            return None
+        record = self.table[row]
+        count = int(record['count']) if top_n is None else min(top_n, int(record['count']))
+        return {
+            "ids": [[str(doc_id) for doc_id in record['ids'][:count]]],
+            "distances": [record['distances'][:count].tolist()]
+        }
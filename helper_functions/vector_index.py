@@ -0,0 +1,257 @@
+import numpy as np
+
+# Distance functions supported by ChromaDB collections ("hnsw:space"). Chroma
+# defaults to squared L2.
+SPACES = ('l2', 'cosine', 'ip')
+
+# Compact code types of QuantizedVectorIndex
+QUANTIZED_DTYPES = ('int8', 'float16')
+
+
+def normalize_rows(matrix):
+    """Scale every row to unit length, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def top_k(distances, k):
+    """Column indices of the k smallest distances of every row, closest first."""
+    k = min(k, distances.shape[1])
+    if k == 0:
+        return np.empty((distances.shape[0], 0), dtype=np.int64)
+    if k < distances.shape[1]:
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+    candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+    order = np.argsort(candidate_distances, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class NumpyVectorIndex:
+    """Exact in-process vector search over a normalized float32 matrix.
+
+    It answers query() with the same arguments and result shape as a ChromaDB
+    collection, so it can be passed anywhere a collection is queried, and it
+    serves as exact ground truth for approximate indexes.
+    """
+
+    def __init__(self, ids, documents, embeddings, metadatas=None, space='l2'):
+        self.set_documents(ids, documents, metadatas, space)
+        self.matrix = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(self.ids), -1))
+
+    def set_documents(self, ids, documents, metadatas, space):
+        if space not in SPACES:
+            raise ValueError(f"Unsupported space {space!r}, expected one of {SPACES}")
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas is not None else [None] * len(self.ids)
+        self.space = space
+        self.metadata_columns = {}
+        self.positions = None
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, ids=None, include=("documents", "metadatas"), **kwargs):
+        """Look documents up by id, shaped like a Chroma get() result."""
+        if ids is None:
+            positions = range(len(self.ids))
+        else:
+            if self.positions is None:
+                self.positions = {doc_id: position for position, doc_id in enumerate(self.ids)}
+            positions = [self.positions[doc_id] for doc_id in ids if doc_id in self.positions]
+        results = {"ids": [self.ids[position] for position in positions]}
+        if "documents" in include:
+            results["documents"] = [self.documents[position] for position in positions]
+        if "metadatas" in include:
+            results["metadatas"] = [self.metadatas[position] for position in positions]
+        return results
+
+    @property
+    def nbytes(self):
+        """Size of the vectors searched by the index."""
+        return self.matrix.nbytes
+
+    def prepare_queries(self, query_embeddings):
+        return np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+
+    def distances(self, queries):
+        """Distances between every query and every document, one row per query."""
+        # One matrix-matrix product scores the whole batch
+        return self.to_distances(queries, queries @ self.matrix.T)
+
+    def to_distances(self, queries, similarities):
+        """Turn dot products with unit-length documents into the index's distance."""
+        if self.space == 'l2':
+            # |q - d|^2 with unit-length documents
+            return np.sum(queries * queries, axis=1, keepdims=True) + 1 - 2 * similarities
+        if self.space == 'cosine':
+            query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            query_norms[query_norms == 0] = 1
+            return 1 - similarities / query_norms
+        return 1 - similarities
+
+    def metadata_column(self, field):
+        """Values of one metadata field for every document (None when missing)."""
+        if field not in self.metadata_columns:
+            column = np.empty(len(self.ids), dtype=object)
+            column[:] = [meta.get(field) if meta else None for meta in self.metadatas]
+            self.metadata_columns[field] = column
+        return self.metadata_columns[field]
+
+    def where_mask(self, where):
+        """Boolean mask of the documents matching a Chroma where clause."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == '$and':
+                for clause in condition:
+                    mask &= self.where_mask(clause)
+            elif key == '$or':
+                matched = np.zeros(len(self.ids), dtype=bool)
+                for clause in condition:
+                    matched |= self.where_mask(clause)
+                mask &= matched
+            else:
+                mask &= self.field_mask(key, condition)
+        return mask
+
+    def field_mask(self, field, condition):
+        column = self.metadata_column(field)
+        present = np.array([value is not None for value in column], dtype=bool)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        mask = present.copy()
+        for operator, operand in condition.items():
+            if operator == '$eq':
+                mask &= column == operand
+            elif operator == '$ne':
+                mask &= column != operand
+            elif operator == '$in':
+                mask &= np.isin(column, operand)
+            elif operator == '$nin':
+                mask &= ~np.isin(column, operand)
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                compare = {'$gt': np.greater, '$gte': np.greater_equal,
+                           '$lt': np.less, '$lte': np.less_equal}[operator]
+                values = np.array([value if value is not None else np.nan for value in column], dtype=float)
+                with np.errstate(invalid='ignore'):
+                    mask &= compare(values, operand)
+            else:
+                raise ValueError(f"Unsupported where operator {operator!r}")
+        return mask
+
+    def search(self, queries, n_results, mask=None):
+        """Positions and distances of the n_results closest documents, one row per query."""
+        distances = self.distances(queries)
+        if mask is not None:
+            distances = np.where(mask, distances, np.inf)
+        positions = top_k(distances, n_results)
+        return positions, np.take_along_axis(distances, positions, axis=1)
+
+    def query(self, query_embeddings, n_results=10, where=None, **kwargs):
+        """Return the n_results closest documents per query, shaped like a Chroma result."""
+        queries = self.prepare_queries(query_embeddings)
+        mask = None
+        if where:
+            mask = self.where_mask(where)
+            n_results = min(n_results, int(mask.sum()))
+
+        results = {"ids": [], "documents": [], "distances": [], "metadatas": []}
+        all_positions, all_distances = self.search(queries, n_results, mask)
+        for positions, distances in zip(all_positions, all_distances):
+            results["ids"].append([self.ids[position] for position in positions])
+            results["documents"].append([self.documents[position] for position in positions])
+            results["distances"].append(distances.tolist())
+            results["metadatas"].append([self.metadatas[position] for position in positions])
+        return results
+
+
+class QuantizedVectorIndex(NumpyVectorIndex):
+    """Vector search on int8 (scalar-quantized) or float16 codes with exact re-ranking.
+
+    Candidates are selected on the compact codes; the best n_results *
+    rerank_factor of them are re-scored against full-precision vectors read
+    from full_precision, which can be a memory-mapped matrix (for example the
+    embedding cache) so that float32 vectors never need to stay resident.
+    """
+
+    def __init__(self, ids, documents, embeddings, metadatas=None, space='l2',
+                 dtype='int8', rerank_factor=4, full_precision=None, block_size=65536):
+        if dtype not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {QUANTIZED_DTYPES}")
+        self.set_documents(ids, documents, metadatas, space)
+        self.dtype = dtype
+        self.rerank_factor = rerank_factor
+        self.block_size = block_size
+        self.full_precision = embeddings if full_precision is None else full_precision
+
+        normalized = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(len(self.ids), -1))
+        if dtype == 'int8':
+            # Symmetric per-dimension scales map [-max, max] onto [-127, 127]
+            self.scales = np.abs(normalized).max(axis=0) / 127
+            self.scales[self.scales == 0] = 1
+            self.codes = np.round(normalized / self.scales).astype(np.int8)
+        else:
+            self.scales = None
+            self.codes = normalized.astype(np.float16)
+
+    @property
+    def nbytes(self):
+        """Size of the codes (and scales) searched by the index."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def approximate_similarities(self, queries):
+        """Dot products of the queries with the decoded codes, computed block by block."""
+        # Folding the int8 scales into the queries avoids decoding the matrix
+        scaled_queries = queries * self.scales if self.scales is not None else queries
+        similarities = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_size):
+            block = self.codes[start:start + self.block_size].astype(np.float32)
+            similarities[:, start:start + self.block_size] = scaled_queries @ block.T
+        return similarities
+
+    def search(self, queries, n_results, mask=None):
+        distances = self.to_distances(queries, self.approximate_similarities(queries))
+        if mask is not None:
+            distances = np.where(mask, distances, np.inf)
+        candidates = top_k(distances, n_results * self.rerank_factor)
+        if mask is not None:
+            # Drop filtered-out candidates before re-ranking
+            n_candidates = min(candidates.shape[1], int(mask.sum()))
+            candidates = candidates[:, :n_candidates]
+
+        all_positions = np.empty((len(queries), min(n_results, candidates.shape[1])), dtype=np.int64)
+        all_distances = np.empty(all_positions.shape, dtype=np.float32)
+        for row, (query, row_candidates) in enumerate(zip(queries, candidates)):
+            # Re-rank at full precision, reading only the candidate rows
+            order = np.argsort(row_candidates)
+            vectors = np.asarray(self.full_precision[row_candidates[order]], dtype=np.float32)
+            exact = self.to_distances(query[None, :], query[None, :] @ normalize_rows(vectors).T)[0]
+            best = top_k(exact[None, :], all_positions.shape[1])[0]
+            all_positions[row] = row_candidates[order][best]
+            all_distances[row] = exact[best]
+        return all_positions, all_distances
+
+
+def recall_at_k(results, reference):
+    """Mean fraction of the reference ids per query that results also returned."""
+    recalls = []
+    for ids, reference_ids in zip(results["ids"], reference["ids"]):
+        if reference_ids:
+            recalls.append(len(set(ids) & set(reference_ids)) / len(reference_ids))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+def evaluate_quantization(index, reference, query_embeddings, k=10):
+    """Compare a quantized index with the exact one: memory saved against recall@k."""
+    results = index.query(query_embeddings=query_embeddings, n_results=k)
+    expected = reference.query(query_embeddings=query_embeddings, n_results=k)
+    return {
+        "dtype": index.dtype,
+        "bytes": index.nbytes,
+        "reference_bytes": reference.nbytes,
+        "compression": reference.nbytes / index.nbytes if index.nbytes else float('inf'),
+        f"recall@{k}": recall_at_k(results, expected)
+    }
@@ -0,0 +1,35 @@
+"""Precompute the top-N recommendations of every user into the recommendation table.
+
+The dashboard serves unfiltered views from the table with one row lookup.
+The table records the content fingerprint and users file hash it was
+computed from; the dashboard falls back to live queries once either file
+changes, until this job is re-run. The new table atomically replaces the old
+one.
+
+Usage:
+    python precompute_recommendations.py [--users ./data/users.json] [--content ./data/content.json]
+"""
+import argparse
+import time
+
+import streamlit_vector_db as vector_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="./data/users.json", help="users JSON file")
+    parser.add_argument("--content", default="./data/content.json", help="content JSON file")
+    parser.add_argument("--output", default=vector_db.RECOMMENDATION_TABLE_PATH, help="recommendation table file")
+    parser.add_argument("--top-n", type=int, default=vector_db.RECOMMENDATION_TABLE_TOP_N, help="recommendations kept per user")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fingerprint = vector_db.corpus_fingerprint(args.content)
+    collection, _ = vector_db.build_content_index(args.content, fingerprint)
+    user_count = vector_db.precompute_recommendations(collection, args.users, args.output, args.top_n, fingerprint)
+    print(f"Wrote {user_count} users x {args.top_n} recommendations to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,28 @@
 import streamlit as st
-from functions.helper_functions import load_data, match_country_content
+from helper_functions.app_cache import start_incremental_matcher, rerun_on_change
+
+USERS_FILE_PATH = 'users.json'
+CONTENT_FILE_PATH = 'content.json'
+TOP_N_OPTIONS = [1, 3, 5, 10, 15, 25]
 
 # Main application
 def main():
     st.title("User Content Matcher")
 
-    users, content = load_data()
-    user_content = match_country_content(users, content)
+    # Every user's ranked matches are built once per process and kept current
+    # by a file watcher: an edit of users.json or content.json only re-ranks
+    # the users affected by the changed records. The refresh here applies an
+    # edit the watcher has not polled yet.
+    matcher = start_incremental_matcher(USERS_FILE_PATH, CONTENT_FILE_PATH, max(TOP_N_OPTIONS))
+    matcher.refresh(USERS_FILE_PATH, CONTENT_FILE_PATH)
+    rerun_on_change([USERS_FILE_PATH, CONTENT_FILE_PATH])
 
     # Dropdown for selecting a user
-    user_names = [user['name'] for user in users]
+    user_names = matcher.user_names()
     selected_user = st.selectbox("Select a user:", user_names)
 
     # Display selected user's interests
-    user_info = next(user for user in users if user['name'] == selected_user)
+    user_info = matcher.user(selected_user)
     st.subheader(f"{selected_user}'s Interests:")
     interests = user_info['interests']
     for interest in interests:
@@ -24,14 +33,15 @@ def main():
 
     # Display selected user's relevant content
     st.subheader(f"Relevant Content for {selected_user}:")
-    relevant_content = user_content.get(selected_user, [])
-    
-    # Sort relevant content based on priority (assuming 'priority' is a key in each content item)
-    relevant_content.sort(key=lambda x: x.get('priority', 0), reverse=True)
+    top_n_options = TOP_N_OPTIONS
+
+    # Matches ranked by matched tags, thresholds and priority, the best of the
+    # largest option
+    ranked_content = matcher.ranking(selected_user)
+    relevant_content = [item for item, score in ranked_content]
 
     # Dropdown for selecting the number of top contents to display
-    top_n_options = [1, 3, 5, 10, 15, 25]
-    max_display = min(len(relevant_content), max(top_n_options))  # Limit to a maximum of the highest option
+    max_display = len(relevant_content)
     top_n = st.selectbox("Select number of top contents to display:", 
                          [option for option in top_n_options if option <= max_display])
 
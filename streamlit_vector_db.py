@@ -1,113 +1,578 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
 import numpy as np
+import hashlib
 import json
-import streamlit as st
+import logging
+import os
+from itertools import islice
 
-# Load the pre-trained SentenceTransformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from helper_functions.helper_functions import iter_json_array, file_content_hash
+from helper_functions.content_store import load_content_store
+from helper_functions.binary_dataset import is_binary_dataset, open_binary_dataset
+from helper_functions.embedding_cache import EmbeddingCache, LRUEmbeddingCache, UserEmbeddingStore
+from helper_functions.ingest_pipeline import Pipeline
+from helper_functions import instrumentation
+from helper_functions.instrumentation import span, timed
+from helper_functions.recommendation_table import RecommendationTable, build_recommendation_table, write_recommendation_table
+from helper_functions.vector_index import QUANTIZED_DTYPES, NumpyVectorIndex, QuantizedVectorIndex
 
-def load_json(file_path):
-    """Load data from a JSON file."""
-    with open(file_path, 'r') as file:
+logger = logging.getLogger(__name__)
+
+# The pre-trained SentenceTransformer model is loaded on first use, so importing
+# this module does not pay for torch and model initialization
+MODEL_NAME = 'all-MiniLM-L6-v2'
+model = None
+
+def load_model(model_name=MODEL_NAME):
+    """Load a SentenceTransformer model."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+def get_model():
+    """Return the embedding model, loading it on first use."""
+    global model
+    if model is None:
+        model = load_model()
+    return model
+
+def encode_texts(texts):
+    """Encode texts with the embedding model, loading it only when something needs encoding."""
+    with span("model.encode", texts=len(texts)):
+        return get_model().encode(texts)
+
+def set_model(new_model):
+    """Inject the embedding model, e.g. a cached instance or a stand-in for tests."""
+    global model
+    if new_model is not model:
+        # Cached interest embeddings belong to the previous model
+        interest_embedding_cache.clear()
+    model = new_model
+
+# Maximum number of documents sent to the collection in one call
+SYNC_BATCH_SIZE = 500
+
+# Batches buffered between two ingest stages before the faster one blocks
+INGEST_QUEUE_SIZE = 4
+
+# Bump when the metadata layout changes so persisted collections are re-synced
+METADATA_VERSION = 2
+
+# Maximum number of query embeddings sent to the collection in one call
+QUERY_BATCH_SIZE = 256
+
+# Persistent ChromaDB location; an empty CHROMA_DATA_DIR keeps the collection in memory
+CHROMA_DATA_DIR = os.environ.get('CHROMA_DATA_DIR', './chroma_data')
+COLLECTION_NAME = "user_interests"
+
+# Vector backend queried for recommendations: 'chroma', the exact in-process
+# 'numpy' index, or an in-process index on 'int8' or 'float16' codes
+VECTOR_BACKEND = os.environ.get('VECTOR_BACKEND', 'chroma')
+
+# Candidates per requested result re-ranked at full precision by the quantized backends
+RERANK_FACTOR = int(os.environ.get('RERANK_FACTOR', '4'))
+
+# Directory of the on-disk content embedding cache
+EMBEDDING_CACHE_DIR = os.environ.get('EMBEDDING_CACHE_DIR', './embedding_cache')
+
+# Interest values shared by many users are embedded once per process
+INTEREST_CACHE_SIZE = int(os.environ.get('INTEREST_CACHE_SIZE', '10000'))
+
+def create_interest_embedding_cache(maxsize=INTEREST_CACHE_SIZE):
+    """Create the cache of interest value embeddings."""
+    return LRUEmbeddingCache(maxsize)
+
+interest_embedding_cache = create_interest_embedding_cache()
+
+# Persisted per-user sums and counts of interest embeddings
+USER_EMBEDDING_STORE_PATH = os.path.join(EMBEDDING_CACHE_DIR, 'user_embeddings.npz')
+
+# Precomputed top-N recommendations of every user, written by precompute_recommendations.py
+RECOMMENDATION_TABLE_PATH = os.environ.get('RECOMMENDATION_TABLE_PATH', './recommendation_table.bin')
+RECOMMENDATION_TABLE_TOP_N = 10
+
+def load_json(file_path, stream=False):
+    """Load data from a JSON file, or yield its records lazily when stream is True.
+
+    A binary content dataset is memory-mapped and returned as a ContentStore
+    in both modes.
+    """
+    if is_binary_dataset(file_path):
+        return open_binary_dataset(file_path)
+    if stream:
+        return iter_json_array(file_path)
+    with span("load_json", file=os.path.basename(file_path)), open(file_path, 'r') as file:
         return json.load(file)
 
-def prepare_content(content_data):
-    """Prepare content for embedding and metadata extraction."""
-    content_full_texts = [item['content'] for item in content_data]
-    content_ids = [item['id'] for item in content_data]
-    content_embeddings = model.encode(content_full_texts)
+def content_interest_types(tags):
+    """Interest types a document covers: the value of 'interest' tags, the type of any other tag."""
+    interest_types = []
+    for tag in tags:
+        if 'type' not in tag:
+            continue
+        interest_type = tag['value'] if tag['type'] == 'interest' else tag['type']
+        if interest_type not in interest_types:
+            interest_types.append(interest_type)
+    return interest_types
+
+def tag_metadata(tags):
+    """Structured, filterable metadata fields for a document's tags."""
+    fields = {}
+    for tag in tags:
+        if 'type' not in tag:
+            continue
+        key = f"tag_{tag['type']}"
+        fields[key] = f"{fields[key]}, {tag['value']}" if key in fields else tag['value']
+    for interest_type in content_interest_types(tags):
+        fields[f"type_{interest_type}"] = True
+    return fields
+
+def build_interest_filter(interest_types):
+    """Chroma where clause matching documents that cover any of the interest types."""
+    clauses = [{f"type_{interest_type}": True} for interest_type in dict.fromkeys(interest_types)]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def query_interest_types(interest_types, selected_interest_types):
+    """Interest types to filter a user's query on, or None for the unfiltered view.
+
+    With every one of the user's types selected the view is unfiltered, like
+    the precomputed recommendation table, so a table hit and a live query
+    return the same documents.
+    """
+    if set(selected_interest_types) >= set(interest_types):
+        return None
+    return list(selected_interest_types)
+
+def index_metadata(metadata):
+    """Map document ids to their metadata for O(1) lookup."""
+    return {meta['id']: meta for meta in metadata}
+
+def prepare_metadata(content_data):
+    """Extract ids, texts and metadata from content without embedding it."""
+    content_full_texts = []
+    content_ids = []
     
-    # Create metadata as a list of dictionaries
+    # Create metadata as a list of dictionaries in the same single pass, so
+    # content_data can be a generator
     metadata = []
     for item in content_data:
+        content_full_texts.append(item['content'])
+        content_ids.append(item['id'])
         # Join interest values into a single string
         interest_values = [tag['value'] for tag in item.get('tags', [])]
-        metadata.append({
+        meta = {
             "id": item['id'],
             "category": item.get('category', 'general'),
             "interests": ', '.join(interest_values)  # Join interests into a single string
-        })
+        }
+        meta.update(tag_metadata(item.get('tags', [])))
+        metadata.append(meta)
     
+    return content_ids, content_full_texts, metadata
+
+def prepare_content(content_data, embedding_cache=None):
+    """Prepare content for embedding and metadata extraction.
+
+    With an embedding_cache only new or changed texts are sent to the model.
+    """
+    content_ids, content_full_texts, metadata = prepare_metadata(content_data)
+    if embedding_cache is not None:
+        content_embeddings = embedding_cache.encode(content_full_texts, encode_texts)
+    else:
+        content_embeddings = encode_texts(content_full_texts)
     return content_ids, content_full_texts, content_embeddings, metadata
 
 def add_content_to_collection(collection, content_ids, content_full_texts, content_embeddings, metadata):
     """Add content and metadata to the ChromaDB collection."""
-    collection.add(
-        ids=content_ids,
-        documents=content_full_texts,
-        embeddings=content_embeddings.tolist(),
-        metadatas=metadata
-    )
-
-def get_user_embedding(interests):
-    """Generate a user embedding based on their interests."""
+    with span("collection.add", documents=len(content_ids)):
+        collection.add(
+            ids=content_ids,
+            documents=content_full_texts,
+            embeddings=content_embeddings.tolist(),
+            metadatas=metadata
+        )
+
+def content_hash(document, metadata, model_name=MODEL_NAME):
+    """Hash of a document, its metadata and the embedding model, used to detect content to re-embed."""
+    payload = json.dumps({"document": document, "metadata": metadata, "model": model_name}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def iter_stored_metadata(collection, batch_size=SYNC_BATCH_SIZE):
+    """Yield the (id, metadata) pairs held by the collection, page by page."""
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        for doc_id, meta in zip(page['ids'], page['metadatas']):
+            yield doc_id, meta or {}
+        if len(page['ids']) < batch_size:
+            return
+        offset += batch_size
+
+def get_stored_hashes(collection, batch_size=SYNC_BATCH_SIZE):
+    """Read the id -> content hash pairs already held by the collection."""
+    return {doc_id: meta.get('content_hash') for doc_id, meta in iter_stored_metadata(collection, batch_size)}
+
+def get_stored_metadata(collection, batch_size=SYNC_BATCH_SIZE):
+    """Read the display metadata of every document held by the collection."""
+    return [
+        {key: value for key, value in meta.items() if key != 'content_hash'}
+        for doc_id, meta in iter_stored_metadata(collection, batch_size)
+    ]
+
+def classify_content(stored_hashes, doc_id, doc, meta, report, model_name=MODEL_NAME):
+    """Count a document as added, updated or skipped; returns its metadata to store, or None when unchanged."""
+    doc_hash = content_hash(doc, meta, model_name)
+    if doc_id not in stored_hashes:
+        report["added"] += 1
+    elif stored_hashes[doc_id] != doc_hash:
+        report["updated"] += 1
+    else:
+        report["skipped"] += 1
+        return None
+    return {**meta, "content_hash": doc_hash}
+
+def delete_removed_content(collection, stored_hashes, content_ids, batch_size=SYNC_BATCH_SIZE):
+    """Delete the stored ids that are no longer in the content; returns how many."""
+    removed_ids = list(stored_hashes.keys() - set(content_ids))
+    for start in range(0, len(removed_ids), batch_size):
+        collection.delete(ids=removed_ids[start:start + batch_size])
+    return len(removed_ids)
+
+def sync_content_to_collection(collection, content_ids, content_full_texts, content_embeddings, metadata, batch_size=SYNC_BATCH_SIZE,
+                               model_name=MODEL_NAME):
+    """Upsert new or changed content in batches and delete ids that disappeared.
+
+    Documents embedded by another model than model_name count as changed.
+    """
+    stored_hashes = get_stored_hashes(collection, batch_size)
+    report = {"added": 0, "updated": 0, "skipped": 0, "removed": 0}
+
+    pending = []
+    for index, (doc_id, doc, meta) in enumerate(zip(content_ids, content_full_texts, metadata)):
+        stored_meta = classify_content(stored_hashes, doc_id, doc, meta, report, model_name)
+        if stored_meta is not None:
+            pending.append((index, stored_meta))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        indices = [index for index, _ in batch]
+        with span("collection.upsert", documents=len(indices)):
+            collection.upsert(
+                ids=[content_ids[index] for index in indices],
+                documents=[content_full_texts[index] for index in indices],
+                embeddings=np.asarray(content_embeddings)[indices].tolist(),
+                metadatas=[meta for _, meta in batch]
+            )
+
+    report["removed"] = delete_removed_content(collection, stored_hashes, content_ids, batch_size)
+    return report
+
+def ingest_content(collection, content_file_path, embedding_cache=None, batch_size=SYNC_BATCH_SIZE, queue_size=INGEST_QUEUE_SIZE,
+                   model_name=MODEL_NAME):
+    """Stream the content file into the collection with parsing, embedding and upserts overlapped.
+
+    Three stages run concurrently on bounded queues: parse (read records in
+    batches of batch_size and keep the new or changed ones), embed and upsert.
+    Like sync_content_to_collection, unchanged documents are skipped, before
+    they are embedded, and ids missing from the file are deleted at the end.
+    Returns the sync report, with per-stage counters under "stages", and the
+    metadata of every document.
+    """
+    stored_hashes = get_stored_hashes(collection, batch_size)
+    report = {"added": 0, "updated": 0, "skipped": 0, "removed": 0}
+    content_ids = []
+    metadata = []
+
+    def parse_batches():
+        records = iter(load_json(content_file_path, stream=True))
+        while True:
+            batch_ids, batch_texts, batch_metadata = prepare_metadata(islice(records, batch_size))
+            if not batch_ids:
+                return
+            content_ids.extend(batch_ids)
+            metadata.extend(batch_metadata)
+            batch = {"ids": [], "documents": [], "metadatas": []}
+            for doc_id, doc, meta in zip(batch_ids, batch_texts, batch_metadata):
+                stored_meta = classify_content(stored_hashes, doc_id, doc, meta, report, model_name)
+                if stored_meta is not None:
+                    batch["ids"].append(doc_id)
+                    batch["documents"].append(doc)
+                    batch["metadatas"].append(stored_meta)
+            if batch["ids"]:
+                yield batch
+
+    def embed(batch):
+        if embedding_cache is not None:
+            batch["embeddings"] = embedding_cache.encode(batch["documents"], encode_texts)
+        else:
+            batch["embeddings"] = encode_texts(batch["documents"])
+        return batch
+
+    def upsert(batch):
+        with span("collection.upsert", documents=len(batch["ids"])):
+            collection.upsert(
+                ids=batch["ids"],
+                documents=batch["documents"],
+                embeddings=np.asarray(batch["embeddings"]).tolist(),
+                metadatas=batch["metadatas"]
+            )
+
+    pipeline = Pipeline(queue_size, count=lambda batch: len(batch["ids"]))
+    report["stages"] = pipeline.run(parse_batches(), [("embed", embed), ("upsert", upsert)], source_name="parse")
+    report["removed"] = delete_removed_content(collection, stored_hashes, content_ids, batch_size)
+    return report, metadata
+
+def get_collection(data_dir=CHROMA_DATA_DIR, collection_name=COLLECTION_NAME):
+    """Open (or create) the collection, persisted under data_dir unless it is empty."""
+    import chromadb
+    client = chromadb.PersistentClient(path=data_dir) if data_dir else chromadb.Client()
+    return client.get_or_create_collection(collection_name)
+
+def corpus_fingerprint(content_file_path, model_name=MODEL_NAME):
+    """Hash of the content file, embedding model and metadata layout the collection was built from."""
+    payload = f"{model_name}\0{METADATA_VERSION}\0{file_content_hash(content_file_path)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def is_collection_current(collection, fingerprint):
+    """Check whether the collection was last synced from the same corpus."""
+    stored = (collection.metadata or {}).get('corpus_fingerprint')
+    return stored == fingerprint and collection.count() > 0
+
+def mark_collection_current(collection, fingerprint):
+    """Record the corpus fingerprint in the collection metadata."""
+    # Index settings (hnsw:*) cannot be modified after creation
+    metadata = {key: value for key, value in (collection.metadata or {}).items() if not key.startswith('hnsw:')}
+    metadata['corpus_fingerprint'] = fingerprint
+    collection.modify(metadata=metadata)
+
+@timed()
+def build_content_index(content_file_path, fingerprint, backend=VECTOR_BACKEND):
+    """Bring the vector backend up to date with the content file, once per corpus fingerprint.
+
+    Returns the object to query (a Chroma collection, a NumpyVectorIndex or a
+    QuantizedVectorIndex) and the id -> metadata index.
+    """
+    if backend == 'numpy':
+        embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME)
+        content_data = load_content_store(content_file_path)
+        content_ids, content_full_texts, content_embeddings, metadata = prepare_content(content_data, embedding_cache)
+        return NumpyVectorIndex(content_ids, content_full_texts, content_embeddings, metadata), index_metadata(metadata)
+    if backend in QUANTIZED_DTYPES:
+        embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME)
+        content_data = load_content_store(content_file_path)
+        content_ids, content_full_texts, content_embeddings, metadata = prepare_content(content_data, embedding_cache)
+        # Re-ranking reads full-precision rows from the memory-mapped cache, so
+        # only the codes stay resident
+        index = QuantizedVectorIndex(content_ids, content_full_texts, content_embeddings, metadata,
+                                     dtype=backend, rerank_factor=RERANK_FACTOR,
+                                     full_precision=embedding_cache.mapped_rows(content_full_texts))
+        return index, index_metadata(metadata)
+    if backend != 'chroma':
+        raise ValueError(f"Unknown vector backend {backend!r}, expected 'chroma', 'numpy', 'int8' or 'float16'")
+
+    collection = get_collection()
+    if is_collection_current(collection, fingerprint):
+        # Warm start: the collection already holds this corpus, so the content
+        # file is not read at all; the display metadata comes from the collection
+        metadata = get_stored_metadata(collection)
+    else:
+        embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, MODEL_NAME)
+
+        # Stream the file into the collection, only embedding and writing what changed
+        sync_report, metadata = ingest_content(collection, content_file_path, embedding_cache)
+        mark_collection_current(collection, fingerprint)
+        logger.info("Content sync: %s", sync_report)
+    return collection, index_metadata(metadata)
+
+def load_users(file_path, file_hash):
+    """Load the users file once per version of its content."""
+    return load_json(file_path)
+
+def get_user_store(file_path, model_name=MODEL_NAME):
+    """Open the persisted user embedding store once per process."""
+    return UserEmbeddingStore(file_path, model_name)
+
+def encode_interests(interest_values):
+    """Embed interest values through the process-wide interest cache."""
+    return interest_embedding_cache.encode(interest_values, encode_texts)
+
+def get_user_embedding(interests, user_id=None, user_store=None):
+    """Generate a user embedding based on their interests.
+
+    With a user_store the stored sum and count of the user's embeddings are
+    updated with only the interests that changed.
+    """
     interest_values = [interest['value'] for interest in interests]
-    interest_embeddings = model.encode(interest_values)
+    if user_store is not None:
+        return user_store.embedding(user_id, interest_values, encode_interests)
+    interest_embeddings = encode_interests(interest_values)
     return np.mean(interest_embeddings, axis=0)
 
-def match_user_to_content(collection, user_id, interests, top_n=3):
-    """Match a user to content based on their interests."""
-    user_embedding = get_user_embedding(interests)
-    results = collection.query(
-        query_embeddings=[user_embedding.tolist()],
-        n_results=top_n
-    )
+def match_user_to_content(collection, user_id, interests, top_n=3, user_store=None, interest_types=None):
+    """Match a user to content based on their interests.
+
+    When interest_types is given, only documents covering one of them are
+    returned; the filter runs inside the collection query.
+    """
+    query = {}
+    if interest_types is not None:
+        where = build_interest_filter(interest_types)
+        if where is None:
+            return {"ids": [[]], "documents": [[]], "distances": [[]], "metadatas": [[]]}
+        query["where"] = where
+    user_embedding = get_user_embedding(interests, user_id, user_store)
+    with span("collection.query", queries=1, n_results=top_n):
+        results = collection.query(
+            query_embeddings=[user_embedding.tolist()],
+            n_results=top_n,
+            **query
+        )
     return results
 
+def get_user_embeddings(users_interests):
+    """Generate the embeddings of many users with a single encode call."""
+    users_interests = list(users_interests)
+    interest_values = [interest['value'] for interests in users_interests for interest in interests]
+    interest_embeddings = encode_interests(interest_values)
+
+    user_embeddings = []
+    start = 0
+    for interests in users_interests:
+        end = start + len(interests)
+        user_embeddings.append(np.mean(interest_embeddings[start:end], axis=0))
+        start = end
+    return np.array(user_embeddings)
+
+def split_query_results(results, row):
+    """Extract the results of one query embedding from a multi-embedding query."""
+    user_results = {}
+    for key, value in results.items():
+        # Per-query fields are lists with one entry per query embedding
+        if isinstance(value, list):
+            user_results[key] = [value[row]]
+        else:
+            user_results[key] = value
+    return user_results
+
+def match_users_to_content(collection, users, top_n=3, query_batch_size=QUERY_BATCH_SIZE):
+    """Match many users to content, sending their embeddings in chunked queries.
+
+    users may be a stream; only one chunk of user records is held at a time.
+    """
+    users = iter(users)
+    user_recommendations = {}
+    while True:
+        batch = list(islice(users, query_batch_size))
+        if not batch:
+            return user_recommendations
+        user_embeddings = get_user_embeddings(user['interests'] for user in batch)
+        with span("collection.query", queries=len(batch), n_results=top_n):
+            results = collection.query(query_embeddings=user_embeddings.tolist(), n_results=top_n)
+        for row, user in enumerate(batch):
+            user_recommendations[user['name']] = split_query_results(results, row)
+
 def process_all_users(collection, file_path, top_n):
     """Process all users and generate recommendations."""
-    user_recommendations = {}
-    users = load_json(file_path)
+    users = load_json(file_path, stream=True)
+    return match_users_to_content(collection, users, top_n)
 
-    for user in users:
-        user_id = user['name']
-        interests = user['interests']
-        recommendations = match_user_to_content(collection, user_id, interests, top_n)
-        user_recommendations[user_id] = recommendations
-    
-    return user_recommendations
+def precompute_recommendations(collection, users_file_path, table_path=RECOMMENDATION_TABLE_PATH, top_n=RECOMMENDATION_TABLE_TOP_N,
+                               fingerprint=None):
+    """Match every user and atomically replace the recommendation table; returns the user count.
+
+    fingerprint is the corpus_fingerprint of the content in the collection;
+    it is stored in the table with the users file hash, and lookups only use
+    the table while both still match.
+    """
+    users_hash = file_content_hash(users_file_path)
+    user_recommendations = process_all_users(collection, users_file_path, top_n)
+    write_recommendation_table(table_path, build_recommendation_table(user_recommendations, top_n), fingerprint, users_hash)
+    return len(user_recommendations)
+
+def load_recommendation_table(file_path, file_version):
+    """Open the recommendation table once per version of the file, or None when there is none."""
+    if file_version is None:
+        return None
+    return RecommendationTable(file_path)
+
+def recommendation_table_version(file_path):
+    """Cache key of the current table file; changes whenever the job replaces it."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
+def lookup_recommendations(table, collection, user_id, top_n, fingerprint, users_hash):
+    """Read a user's recommendations from the precomputed table, with their documents.
+
+    Returns None when the table cannot answer (no table, a table computed
+    from other content or users, an unknown user, more results requested
+    than were precomputed or a recommended document no longer in the
+    collection) and the caller should query live.
+    """
+    if table is None or top_n > table.top_n or not table.is_current(fingerprint, users_hash):
+        return None
+    results = table.recommendations(user_id, top_n)
+    if results is None:
+        return None
+    ids = results["ids"][0]
+    documents = collection.get(ids=ids, include=["documents"]) if ids else {"ids": [], "documents": []}
+    document_by_id = dict(zip(documents["ids"], documents["documents"]))
+    if any(doc_id not in document_by_id for doc_id in ids):
+        return None
+    results["documents"] = [[document_by_id[doc_id] for doc_id in ids]]
+    return results
+
+@timed()
 def filter_recommendations(recommendations, user_interests, selected_interests, metadata):
     """Filter recommendations based on selected interest types."""
     filtered_docs = []
+    metadata_by_id = metadata if isinstance(metadata, dict) else index_metadata(metadata)
     for index, (doc, score, doc_id) in enumerate(zip(recommendations['documents'][0], recommendations['distances'][0], recommendations['ids'][0])):
         # Check if the interest type is in the selected interests
         if any(interest['type'] in selected_interests for interest in user_interests):
             # Get the interest value from the metadata
-            interest_value = next((meta['interests'] for meta in metadata if meta['id'] == doc_id), None)
+            meta = metadata_by_id.get(doc_id)
+            interest_value = meta['interests'] if meta else None
             filtered_docs.append((index + 1, doc_id, doc, 1 - score, interest_value))
     return filtered_docs
 
-if __name__ == "__main__":
+def render_dashboard():
+    """Render one run of the Streamlit dashboard."""
+    global interest_embedding_cache
+    import streamlit as st
+
     # Paths to the JSON files
     users_json_file_path = './data/users.json'
     content_json_file_path = './data/content.json'
-    
-    # Initialize ChromaDB client
-    client = chromadb.Client()
-    
-    # Check if the collection already exists
-    collection_name = "user_interests"
-    try:
-        collection = client.get_collection(collection_name)
-    except Exception:
-        # If the collection does not exist, create it
-        collection = client.create_collection(collection_name)
-
-    # Load and prepare content data
-    content_data = load_json(content_json_file_path)
-    content_ids, content_full_texts, content_embeddings, metadata = prepare_content(content_data)
-    
-    # Add content to the collection
-    add_content_to_collection(collection, content_ids, content_full_texts, content_embeddings, metadata)
-    
+
     # Streamlit dashboard
     st.set_page_config(page_title="Content Recommendations")
     st.title("Content Recommendations")
 
+    # Streamlit reruns the script on every interaction; the model and caches
+    # are process-wide resources shared by every session
+    set_model(st.cache_resource(show_spinner=False)(load_model)())
+    interest_embedding_cache = st.cache_resource(show_spinner=False)(create_interest_embedding_cache)()
+    
+    # Rerun open pages when a data file changes. A new content.json gets a new
+    # corpus fingerprint, and ingest_content then only embeds and writes the
+    # documents whose hash changed; users are re-embedded from the interests
+    # that changed through the user store.
+    from helper_functions.app_cache import rerun_on_change
+    rerun_on_change([users_json_file_path, content_json_file_path])
+
+    # Load and prepare content data; cached until content.json changes. Data
+    # versioned caches keep only their latest entry, so the index, users and
+    # table of a replaced file are freed instead of piling up on every edit.
+    cached_content_index = st.cache_resource(show_spinner="Indexing content...", max_entries=1)(build_content_index)
+    fingerprint = corpus_fingerprint(content_json_file_path)
+    collection, metadata_by_id = cached_content_index(content_json_file_path, fingerprint)
+
     # Create a dropdown menu for selecting users
-    users = load_json(users_json_file_path)
+    users_hash = file_content_hash(users_json_file_path)
+    users = st.cache_data(show_spinner=False, max_entries=1)(load_users)(users_json_file_path, users_hash)
     user_names = [user['name'] for user in users]
     selected_user = st.selectbox("Select a user", user_names)
 
@@ -129,10 +594,24 @@ if __name__ == "__main__":
 
     # Display recommendations for the selected user
     st.subheader(f"Recommendations for {selected_user}:")
-    recommendations = process_all_users(collection, users_json_file_path, top_n)[selected_user]
+    # Single-user fast path: a table lookup, or one query for the user being displayed
+    recommendations = None
+    query_types = query_interest_types(interest_types, selected_interest_types)
+    if query_types is None:
+        # Unfiltered view: read the user's row of the precomputed table
+        table = st.cache_resource(show_spinner=False, max_entries=1)(load_recommendation_table)(
+            RECOMMENDATION_TABLE_PATH, recommendation_table_version(RECOMMENDATION_TABLE_PATH))
+        recommendations = lookup_recommendations(table, collection, selected_user, top_n, fingerprint, users_hash)
+    if recommendations is None:
+        user_store = st.cache_resource(show_spinner=False)(get_user_store)(USER_EMBEDDING_STORE_PATH)
+        recommendations = match_user_to_content(collection, selected_user, user_info['interests'], top_n, user_store,
+                                                interest_types=query_types)
+        # Only writes when this query added or changed a user
+        user_store.save()
 
-    # Filter recommendations based on selected interest types
-    filtered_recommendations = filter_recommendations(recommendations, user_info['interests'], selected_interest_types, metadata)
+    # The interest type filter (if any) already ran inside the query; this only
+    # attaches the display tags through the id -> metadata index
+    filtered_recommendations = filter_recommendations(recommendations, user_info['interests'], selected_interest_types, metadata_by_id)
 
     # Display filtered recommendations
     if filtered_recommendations:
@@ -142,4 +621,15 @@ if __name__ == "__main__":
                 st.write(f"Document Tags: {interest_value}")
                 st.write(f"Document Context: {doc}")
     else:
-        st.write("No recommendations found based on the selected interest types.")
\ No newline at end of file
+        st.write("No recommendations found based on the selected interest types.")
+
+def main():
+    """Run the Streamlit dashboard, with a per-stage timing panel when instrumentation is enabled."""
+    with instrumentation.collect() as records:
+        render_dashboard()
+    if instrumentation.ENABLED:
+        import streamlit as st
+        instrumentation.render_sidebar(st, records)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import json
+
+from helper_functions.app_cache import start_incremental_matcher
+from helper_functions.helper_functions import file_content_hash
+
+mock_users = [
+    {
+        "name": "Alice",
+        "interests": [
+            {"type": "country", "value": "USA"},
+            {"type": "topic", "value": "Technology"}
+        ]
+    }
+]
+
+mock_content = [
+    {"id": "1", "title": "Content 1", "content": "a", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Technology"}]},
+    {"id": "2", "title": "Content 2", "content": "b", "tags": [{"type": "country", "value": "USA"}]}
+]
+
+def write_data(tmp_path):
+    users_path = tmp_path / "users.json"
+    content_path = tmp_path / "content.json"
+    users_path.write_text(json.dumps(mock_users))
+    content_path.write_text(json.dumps(mock_content))
+    return str(users_path), str(content_path)
+
+def test_file_content_hash_follows_content(tmp_path):
+    users_path, content_path = write_data(tmp_path)
+    first = file_content_hash(users_path)
+
+    assert file_content_hash(users_path) == first
+    with open(users_path, 'w') as f:
+        json.dump(mock_users * 2, f)
+    assert file_content_hash(users_path) != first
+
+def test_start_incremental_matcher(tmp_path):
+    users_path, content_path = write_data(tmp_path)
+
+    matcher = start_incremental_matcher(users_path, content_path, 5, interval=60)
+    try:
+        assert matcher.user_names() == ["Alice"]
+        assert [dict(item) for item, score in matcher.ranking("Alice")] == mock_content
+    finally:
+        matcher.watcher.stop()
@@ -0,0 +1,97 @@
+import json
+import numpy as np
+import pytest
+
+from helper_functions.binary_dataset import write_binary_dataset, open_binary_dataset, convert_json, is_binary_dataset
+from helper_functions.change_tracking import IncrementalMatcher
+from helper_functions.content_store import ContentStore, load_content_store
+from helper_functions.helper_functions import build_tag_index, match_country_content
+
+mock_content_data = [
+    {
+        "id": "1",
+        "title": "Tech Innovations in USA",
+        "content": "This article discusses tech innovations in the USA.",
+        "tags": [
+            {"type": "interest", "value": "technology", "threshold": 0.77},
+            {"type": "country", "value": "USA", "threshold": 0.32}
+        ]
+    },
+    {
+        "id": "2",
+        "title": "Santé au Canada",
+        "content": "Conseils de santé.",
+        "category": "health",
+        "priority": 2,
+        "source": {"name": "feed"},
+        "tags": [
+            {"type": "interest", "value": "health"},
+            {"type": "country", "value": "Canada"}
+        ]
+    },
+    {
+        "id": "3",
+        "title": "Untagged",
+        "content": ""
+    }
+]
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    json_path = tmp_path / "content.json"
+    json_path.write_text(json.dumps(mock_content_data))
+    binary_path = str(tmp_path / "content.cbin")
+    assert convert_json(str(json_path), binary_path) == 3
+    return binary_path
+
+def test_round_trip(dataset_path):
+    store = open_binary_dataset(dataset_path)
+
+    assert len(store) == 3
+    assert [dict(item) for item in store] == mock_content_data
+    assert store[1]['source'] == {"name": "feed"}
+
+def test_columns_are_memory_mapped(dataset_path):
+    store = open_binary_dataset(dataset_path)
+
+    assert isinstance(store.tag_offsets.base, np.memmap)
+    assert isinstance(store.texts.buffer.base, np.memmap)
+    assert store.tag_offsets.ctypes.data % 64 == 0
+
+def test_matching_on_binary_store(dataset_path):
+    store = open_binary_dataset(dataset_path)
+    users = [{"name": "Alice", "interests": [{"type": "country", "value": "Canada"}]}]
+
+    assert build_tag_index(store) == build_tag_index(mock_content_data)
+    assert match_country_content(users, store) == {"Alice": [mock_content_data[1]]}
+
+def test_load_content_store_detects_binary(dataset_path):
+    assert is_binary_dataset(dataset_path)
+    store = load_content_store(dataset_path)
+
+    assert isinstance(store, ContentStore)
+    assert dict(store[0]) == mock_content_data[0]
+
+def test_write_empty_store(tmp_path):
+    path = str(tmp_path / "empty.cbin")
+    write_binary_dataset(ContentStore.from_records([]), path)
+
+    assert list(open_binary_dataset(path)) == []
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "content.cbin"
+    path.write_text(json.dumps(mock_content_data))
+
+    with pytest.raises(ValueError):
+        open_binary_dataset(str(path))
+
+def test_incremental_matcher_on_binary_dataset(dataset_path, tmp_path):
+    users = [{"name": "Alice", "interests": [{"type": "country", "value": "Canada"}, {"type": "interest", "value": "health"}]}]
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps(users))
+    matcher = IncrementalMatcher(top_n=5, require_country=True)
+
+    changes = matcher.refresh(str(users_path), dataset_path)
+
+    assert changes["content"]["added"] == 3
+    assert [dict(item) for item, score in matcher.ranking("Alice")] == [mock_content_data[1]]
@@ -0,0 +1,131 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from helper_functions.change_tracking import diff_records, record_hash, IncrementalMatcher, FileWatcher
+from helper_functions.helper_functions import rank_all_users
+
+mock_users = [
+    {"name": "Alice", "interests": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Technology"}]},
+    {"name": "Bob", "interests": [{"type": "country", "value": "Canada"}, {"type": "topic", "value": "Sports"}]}
+]
+
+mock_content = [
+    {"id": "1", "title": "Content 1", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Technology"}]},
+    {"id": "2", "title": "Content 2", "tags": [{"type": "country", "value": "Canada"}]},
+    {"id": "3", "title": "Content 3", "tags": [{"type": "topic", "value": "Sports"}]}
+]
+
+def test_record_hash_ignores_key_order():
+    assert record_hash({"a": 1, "b": 2}) == record_hash({"b": 2, "a": 1})
+    assert record_hash({"a": 1}) != record_hash({"a": 2})
+
+def test_diff_records():
+    _, _, hashes = diff_records({}, mock_content, 'id')
+    changed = [dict(mock_content[0], title="Changed"), mock_content[1], {"id": "4", "title": "New", "tags": []}]
+
+    delta, current, _ = diff_records(hashes, changed, 'id')
+
+    assert delta == {"added": ["4"], "modified": ["1"], "removed": ["3"]}
+    assert current["1"]["title"] == "Changed"
+
+def test_incremental_matcher_matches_full_ranking():
+    matcher = IncrementalMatcher(top_n=5)
+    matcher.apply_content(mock_content)
+    matcher.apply_users(mock_users)
+
+    expected = rank_all_users(mock_users, mock_content, 5)
+    assert {name: matcher.ranking(name) for name in matcher.user_names()} == expected
+
+def test_content_change_only_reranks_affected_users():
+    matcher = IncrementalMatcher(top_n=5)
+    matcher.apply_content(mock_content)
+    matcher.apply_users(mock_users)
+
+    changed = [mock_content[0], mock_content[1], dict(mock_content[2], tags=[{"type": "topic", "value": "Sports"}], priority=2)]
+    changed.append({"id": "4", "title": "Content 4", "tags": [{"type": "country", "value": "Canada"}]})
+    with patch.object(matcher, '_rank', wraps=matcher._rank) as rank:
+        delta, reranked = matcher.apply_content(changed)
+
+    assert delta == {"added": ["4"], "modified": ["3"], "removed": []}
+    assert reranked == 1
+    rank.assert_called_once_with("Bob")
+    assert matcher.ranking("Bob") == rank_all_users(mock_users, changed, 5)["Bob"]
+
+def test_reordered_content_matches_full_ranking():
+    matcher = IncrementalMatcher(top_n=1)
+    tied = [{"id": f"t{number}", "title": f"Tied {number}", "tags": [{"type": "country", "value": "USA"}]} for number in range(3)]
+    matcher.apply_content(tied + mock_content[1:])
+    matcher.apply_users(mock_users)
+
+    reordered = [mock_content[1], tied[2], tied[1], tied[0], mock_content[2]]
+    delta, reranked = matcher.apply_content(reordered)
+
+    assert delta == {"added": [], "modified": [], "removed": []}
+    assert reranked == 2
+    expected = rank_all_users(mock_users, reordered, 1)
+    assert {name: matcher.ranking(name) for name in matcher.user_names()} == expected
+    assert matcher.ranking("Alice")[0][0]["id"] == "t2"
+
+def test_duplicate_content_ids_are_rejected():
+    matcher = IncrementalMatcher(top_n=5)
+
+    with pytest.raises(ValueError):
+        matcher.apply_content(mock_content + [dict(mock_content[0], title="Again")])
+
+def test_removed_content_and_users():
+    matcher = IncrementalMatcher(top_n=5)
+    matcher.apply_content(mock_content)
+    matcher.apply_users(mock_users)
+
+    matcher.apply_content(mock_content[1:])
+    delta, reranked = matcher.apply_users(mock_users[:1])
+
+    assert delta["removed"] == ["Bob"]
+    assert reranked == 0
+    assert matcher.user_names() == ["Alice"]
+    assert matcher.ranking("Alice") == []
+    assert matcher.ranking("Bob") == []
+
+def test_refresh_applies_file_changes(tmp_path):
+    users_path = tmp_path / "users.json"
+    content_path = tmp_path / "content.json"
+    users_path.write_text(json.dumps(mock_users))
+    content_path.write_text(json.dumps(mock_content))
+    matcher = IncrementalMatcher(top_n=5)
+
+    first = matcher.refresh(str(users_path), str(content_path))
+    unchanged = matcher.refresh(str(users_path), str(content_path))
+    users_path.write_text(json.dumps([mock_users[0], dict(mock_users[1], interests=mock_users[0]['interests'])]))
+    changed = matcher.refresh(str(users_path), str(content_path))
+
+    assert first["users"]["added"] == 2 and first["content"]["added"] == 3
+    assert unchanged == {}
+    assert changed == {"users": {"added": 0, "modified": 1, "removed": 0, "reranked_users": 1}}
+    assert matcher.ranking("Bob") == matcher.ranking("Alice")
+
+def test_file_watcher_poll(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text("[]")
+    on_change = MagicMock()
+    watcher = FileWatcher([str(path)], on_change)
+
+    assert watcher.poll() == []
+    path.write_text(json.dumps(mock_users))
+
+    assert watcher.poll() == [str(path)]
+    on_change.assert_called_once_with([str(path)])
+
+def test_file_watcher_retries_failed_change(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text("[]")
+    on_change = MagicMock(side_effect=[ValueError("half-written"), None])
+    watcher = FileWatcher([str(path)], on_change)
+    path.write_text(json.dumps(mock_users))
+
+    with pytest.raises(ValueError):
+        watcher.poll()
+
+    assert watcher.poll() == [str(path)]
+    assert watcher.poll() == []
+    assert on_change.call_count == 2
@@ -0,0 +1,89 @@
+import json
+import pytest
+
+from helper_functions.content_store import ContentStore, StringColumn, load_content_store
+from helper_functions.helper_functions import build_tag_index, match_country_content, match_country_and_content
+
+mock_content_data = [
+    {
+        "id": "1",
+        "title": "Tech Innovations in USA",
+        "content": "This article discusses tech innovations in the USA.",
+        "tags": [
+            {"type": "interest", "value": "technology", "threshold": 0.77},
+            {"type": "country", "value": "USA", "threshold": 0.32}
+        ]
+    },
+    {
+        "id": "2",
+        "title": "Health Tips for Canadians",
+        "content": "This article provides health tips for Canadians.",
+        "category": "health",
+        "priority": 2,
+        "tags": [
+            {"type": "interest", "value": "health"},
+            {"type": "country", "value": "Canada"}
+        ]
+    },
+    {
+        "id": "3",
+        "title": "Untagged",
+        "content": "Nothing to match here."
+    }
+]
+
+mock_users = [
+    {
+        "name": "Alice",
+        "interests": [
+            {"type": "country", "value": "USA"},
+            {"type": "interest", "value": "technology"}
+        ]
+    },
+    {
+        "name": "Bob",
+        "interests": [{"type": "country", "value": "Canada"}]
+    }
+]
+
+def test_string_column_round_trip():
+    column = StringColumn.from_strings(["a", "", "Québec"])
+
+    assert len(column) == 3
+    assert list(column) == ["a", "", "Québec"]
+
+def test_records_round_trip():
+    store = ContentStore.from_records(mock_content_data)
+
+    assert len(store) == 3
+    assert [dict(record) for record in store] == mock_content_data
+    assert store[1]["category"] == "health"
+    assert "tags" not in store[2]
+    with pytest.raises(KeyError):
+        store[0]["category"]
+
+def test_tag_strings_are_dictionary_encoded():
+    store = ContentStore.from_records(mock_content_data)
+
+    assert store.strings.count("country") == 1
+    assert store.tag_thresholds.dtype.name == "float32"
+    assert list(store.tag_offsets) == [0, 2, 4, 4]
+
+def test_tag_index_matches_build_tag_index():
+    store = ContentStore.from_records(mock_content_data)
+
+    assert build_tag_index(store) == build_tag_index(mock_content_data)
+
+def test_matchers_read_from_store():
+    store = ContentStore.from_records(mock_content_data)
+
+    assert match_country_content(mock_users, store) == match_country_content(mock_users, mock_content_data)
+    assert match_country_and_content(mock_users, store) == match_country_and_content(mock_users, mock_content_data)
+
+def test_load_content_store(tmp_path):
+    file_path = tmp_path / "content.json"
+    file_path.write_text(json.dumps(mock_content_data, indent=4))
+
+    store = load_content_store(file_path)
+
+    assert store[0] == mock_content_data[0]
@@ -0,0 +1,182 @@
+import json
+import os
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from helper_functions import instrumentation
+from helper_functions.embedding_cache import EmbeddingCache, LRUEmbeddingCache, UserEmbeddingStore
+
+def fake_encode(texts):
+    # Deterministic 3-dimensional embeddings derived from the text length
+    return np.array([[len(text), len(text) * 2, 1.0] for text in texts], dtype=np.float32)
+
+def test_encode_only_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model-a")
+    encode = MagicMock(side_effect=fake_encode)
+
+    first = cache.encode(["a", "bb"], encode)
+    second = cache.encode(["bb", "ccc", "a"], encode)
+
+    assert encode.call_count == 2
+    assert encode.call_args_list[1].args[0] == ["ccc"]
+    assert np.array_equal(first, fake_encode(["a", "bb"]))
+    assert np.array_equal(second, fake_encode(["bb", "ccc", "a"]))
+
+def test_warm_restart_does_no_encoding(tmp_path):
+    EmbeddingCache(tmp_path, "model-a").encode(["a", "bb"], fake_encode)
+    encode = MagicMock(side_effect=fake_encode)
+
+    embeddings = EmbeddingCache(tmp_path, "model-a").encode(["bb", "a"], encode)
+
+    encode.assert_not_called()
+    assert np.array_equal(embeddings, fake_encode(["bb", "a"]))
+
+def test_cache_is_keyed_by_model_name(tmp_path):
+    EmbeddingCache(tmp_path, "model-a").encode(["a"], fake_encode)
+
+    cache = EmbeddingCache(tmp_path, "model-b")
+
+    assert "a" not in cache
+    assert len(cache) == 0
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model-a")
+    cache.encode(["a"], fake_encode)
+
+    with pytest.raises(ValueError):
+        cache.encode(["bb"], lambda texts: np.zeros((len(texts), 5)))
+
+def test_appends_do_not_rewrite_the_index(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model-a")
+    cache.encode(["a"], fake_encode)
+    index = (tmp_path / "index.json").read_bytes()
+    modified = os.stat(tmp_path / "index.json").st_mtime_ns
+
+    with patch("helper_functions.embedding_cache.write_json_atomic") as write_index:
+        cache.encode(["bb", "ccc"], fake_encode)
+
+    write_index.assert_not_called()
+    assert (tmp_path / "index.json").read_bytes() == index
+    assert os.stat(tmp_path / "index.json").st_mtime_ns == modified
+    assert os.path.getsize(tmp_path / "keys.bin") == 3 * 64
+    assert np.array_equal(EmbeddingCache(tmp_path, "model-a").encode(["ccc", "a"], fake_encode), fake_encode(["ccc", "a"]))
+
+def test_interrupted_append_is_ignored(tmp_path):
+    EmbeddingCache(tmp_path, "model-a").encode(["a", "bb"], fake_encode)
+    # Rows of a third key reached the disk, its key did not
+    with open(tmp_path / "embeddings.f32", 'ab') as file:
+        file.write(fake_encode(["ccc"]).tobytes())
+    encode = MagicMock(side_effect=fake_encode)
+
+    cache = EmbeddingCache(tmp_path, "model-a")
+    embeddings = cache.encode(["ccc", "a"], encode)
+
+    assert len(cache) == 3
+    encode.assert_called_once_with(["ccc"])
+    assert os.path.getsize(tmp_path / "embeddings.f32") == 3 * 3 * 4
+    assert np.array_equal(embeddings, fake_encode(["ccc", "a"]))
+
+def test_index_with_rows_is_migrated(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model-a")
+    cache.encode(["a", "bb"], fake_encode)
+    (tmp_path / "index.json").write_text(json.dumps({"model_name": "model-a", "dimension": 3, "rows": cache.rows}))
+    os.remove(tmp_path / "keys.bin")
+    encode = MagicMock(side_effect=fake_encode)
+
+    embeddings = EmbeddingCache(tmp_path, "model-a").encode(["bb", "a"], encode)
+
+    encode.assert_not_called()
+    assert np.array_equal(embeddings, fake_encode(["bb", "a"]))
+    assert "rows" not in json.loads((tmp_path / "index.json").read_text())
+
+def test_mapped_rows_follow_text_order(tmp_path):
+    cache = EmbeddingCache(tmp_path, "model-a")
+    cache.encode(["a", "bb", "ccc"], fake_encode)
+
+    rows = cache.mapped_rows(["ccc", "a"])
+
+    assert len(rows) == 2
+    assert np.array_equal(rows[np.array([1, 0])], fake_encode(["a", "ccc"]))
+
+def test_lru_cache_encodes_each_text_once():
+    cache = LRUEmbeddingCache(maxsize=10)
+    encode = MagicMock(side_effect=fake_encode)
+
+    cache.encode(["a", "bb", "a"], encode)
+    embeddings = cache.encode(["bb", "a"], encode)
+
+    encode.assert_called_once_with(["a", "bb"])
+    assert np.array_equal(embeddings, fake_encode(["bb", "a"]))
+    assert (cache.hits, cache.misses) == (3, 2)
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUEmbeddingCache(maxsize=2)
+    cache.encode(["a", "bb"], fake_encode)
+    cache.encode(["a"], fake_encode)
+    cache.encode(["ccc"], fake_encode)
+
+    assert list(cache.entries) == ["a", "ccc"]
+
+def test_user_store_updates_mean_incrementally(tmp_path):
+    store = UserEmbeddingStore(tmp_path / "users.npz")
+    encode = MagicMock(side_effect=fake_encode)
+
+    store.embedding("user1", ["a", "bb"], encode)
+    mean = store.embedding("user1", ["bb", "ccc"], encode)
+
+    # Only the added and the removed interest are encoded the second time
+    assert encode.call_args_list[1].args[0] == ["ccc"]
+    assert encode.call_args_list[2].args[0] == ["a"]
+    assert np.allclose(mean, fake_encode(["bb", "ccc"]).mean(axis=0))
+
+def test_user_store_persists(tmp_path):
+    file_path = tmp_path / "store" / "users.npz"
+    store = UserEmbeddingStore(file_path)
+    store.embedding("user1", ["a", "bb"], fake_encode)
+    store.save()
+    encode = MagicMock(side_effect=fake_encode)
+
+    mean = UserEmbeddingStore(file_path).embedding("user1", ["bb", "a"], encode)
+
+    encode.assert_not_called()
+    assert np.allclose(mean, fake_encode(["a", "bb"]).mean(axis=0))
+
+def test_user_store_saves_only_after_changes(tmp_path):
+    file_path = tmp_path / "users.npz"
+    store = UserEmbeddingStore(file_path, "model-a")
+
+    assert store.save() is False
+    store.embedding("user1", ["a", "bb"], fake_encode)
+    assert store.save() is True
+    modified = os.stat(file_path).st_mtime_ns
+
+    store.embedding("user1", ["a", "bb"], fake_encode)
+    assert store.save() is False
+    assert os.stat(file_path).st_mtime_ns == modified
+
+def test_user_store_of_another_model_is_ignored(tmp_path):
+    file_path = tmp_path / "users.npz"
+    store = UserEmbeddingStore(file_path, "model-a")
+    store.embedding("user1", ["a"], fake_encode)
+    store.save()
+
+    assert "user1" in UserEmbeddingStore(file_path, "model-a")
+    assert "user1" not in UserEmbeddingStore(file_path, "model-b")
+
+def test_caches_emit_hit_and_miss_counters(tmp_path):
+    instrumentation.enable()
+    try:
+        with instrumentation.collect() as records:
+            LRUEmbeddingCache().encode(["a", "a", "bb"], fake_encode)
+            disk_cache = EmbeddingCache(str(tmp_path), "model")
+            disk_cache.encode(["a"], fake_encode)
+            disk_cache.encode(["a", "bb"], fake_encode)
+    finally:
+        instrumentation.enable(False)
+
+    summary = instrumentation.summarize(records)
+    assert summary["interest_cache.hits"]["count"] == 1
+    assert summary["interest_cache.misses"]["count"] == 2
+    assert summary["embedding_cache.hits"]["count"] == 1
+    assert summary["embedding_cache.misses"]["count"] == 2
@@ -2,7 +2,18 @@ import json
 import pytest
 from unittest.mock import mock_open, patch
 
-from helper_functions.helper_functions import load_data, match_country_content, match_country_and_content
+from helper_functions.helper_functions import (
+    load_data,
+    iter_json_array,
+    build_tag_index,
+    build_tag_bitmaps,
+    iter_bitmap_positions,
+    match_country_content,
+    match_country_and_content,
+    match_all_users,
+    rank_content,
+    rank_all_users
+)
 
 @pytest.fixture
 def mock_users_and_content():
@@ -349,4 +360,180 @@ def test_no_country_or_other_interest_match():
     }
 
     result = match_country_and_content(users, content)
-    assert result == expected_output
\ No newline at end of file
+    assert result == expected_output
+
+def test_build_tag_index():
+    content = [
+        {"title": "Content 1", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Health"}]},
+        {"title": "Content 2"},
+        {"title": "Content 3", "tags": [{"type": "country", "value": "USA"}]}
+    ]
+
+    tag_index = build_tag_index(content)
+
+    assert tag_index == {
+        ("country", "USA"): [0, 2],
+        ("topic", "Health"): [0]
+    }
+
+def test_match_country_content_with_prebuilt_index():
+    users = [
+        {
+            "name": "Alice",
+            "interests": [
+                {"type": "country", "value": "USA"},
+                {"type": "topic", "value": "Health"}
+            ]
+        }
+    ]
+    content = [
+        {"title": "Content 1", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Health"}]},
+        {"title": "Content 2", "tags": [{"type": "country", "value": "Canada"}]},
+        {"title": "Content 3", "tags": [{"type": "topic", "value": "Health"}]}
+    ]
+
+    result = match_country_content(users, content, tag_index=build_tag_index(content))
+
+    # Content 1 matches on two tags and is reported once per matching tag
+    assert result == {"Alice": [content[0], content[0], content[2]]}
+
+
+def test_build_tag_bitmaps():
+    tag_index = {("country", "USA"): [0, 2], ("topic", "Health"): [9]}
+
+    tag_bitmaps = build_tag_bitmaps(tag_index, 10)
+
+    assert tag_bitmaps == {("country", "USA"): 0b101, ("topic", "Health"): 1 << 9}
+    assert list(iter_bitmap_positions(tag_bitmaps[("country", "USA")])) == [0, 2]
+
+def test_iter_bitmap_positions_on_large_bitmaps():
+    positions = [0, 7, 8, 63, 64, 100000, 999999]
+    bitmap = sum(1 << position for position in positions)
+
+    assert list(iter_bitmap_positions(bitmap)) == positions
+    assert list(iter_bitmap_positions(0)) == []
+
+def test_match_country_and_content_with_prebuilt_bitmaps():
+    users = [
+        {
+            "name": "Alice",
+            "interests": [
+                {"type": "country", "value": "USA"},
+                {"type": "country", "value": "Canada"},
+                {"type": "topic", "value": "Health"}
+            ]
+        }
+    ]
+    content = [
+        {"title": "Content 1", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Health"}]},
+        {"title": "Content 2", "tags": [{"type": "country", "value": "Canada"}]},
+        {"title": "Content 3", "tags": [{"type": "topic", "value": "Health"}, {"type": "country", "value": "Canada"}]}
+    ]
+    tag_bitmaps = build_tag_bitmaps(build_tag_index(content), len(content))
+
+    result = match_country_and_content(users, content, tag_bitmaps=tag_bitmaps)
+
+    assert result == {"Alice": [content[0], content[2]]}
+
+
+def test_match_all_users_matches_single_user_functions():
+    users = [
+        {
+            "name": "Alice",
+            "interests": [
+                {"type": "country", "value": "USA"},
+                {"type": "topic", "value": "Technology"}
+            ]
+        },
+        {
+            "name": "Bob",
+            "interests": [
+                {"type": "country", "value": "Canada"},
+                {"type": "topic", "value": "Unknown"}
+            ]
+        }
+    ]
+    content = [
+        {"title": "Content 1", "tags": [{"type": "country", "value": "USA"}, {"type": "topic", "value": "Technology"}]},
+        {"title": "Content 2", "tags": [{"type": "country", "value": "Canada"}]},
+        {"title": "Content 3"},
+        {"title": "Content 4", "tags": [{"type": "topic", "value": "Technology"}]}
+    ]
+
+    assert match_all_users(users, content) == match_country_content(users, content)
+    assert match_all_users(users, content, require_country=True) == match_country_and_content(users, content)
+
+
+def test_iter_json_array_streams_records(tmp_path):
+    records = [{"name": "Alice", "interests": []}, {"name": "Bob", "interests": [{"type": "country", "value": "USA"}]}]
+    file_path = tmp_path / "users.json"
+    file_path.write_text(json.dumps(records, indent=4))
+
+    # A tiny chunk size forces records to span several reads
+    stream = iter_json_array(file_path, chunk_size=8)
+
+    assert next(stream) == records[0]
+    assert list(stream) == records[1:]
+
+def test_iter_json_array_scalars_across_chunk_boundaries(tmp_path):
+    text = '[1.5e3,2, -0.25 ,10,true,null,"x,y",{"a":[1,2e-2]},false,1E+2,0]'
+    file_path = tmp_path / "scalars.json"
+    file_path.write_text(text)
+
+    for chunk_size in range(1, len(text) + 1):
+        assert list(iter_json_array(file_path, chunk_size=chunk_size)) == json.loads(text), chunk_size
+
+def test_iter_json_array_rejects_non_array(tmp_path):
+    file_path = tmp_path / "data.json"
+    file_path.write_text(json.dumps({"key": "value"}))
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(file_path))
+
+def test_matchers_consume_streamed_data(tmp_path, mock_users_and_content, monkeypatch):
+    (tmp_path / "users.json").write_text(mock_users_and_content[0])
+    (tmp_path / "content.json").write_text(mock_users_and_content[1])
+    monkeypatch.chdir(tmp_path)
+
+    users, content = load_data(stream=True)
+    result = match_country_content(users, content)
+
+    assert result == {"Alice": [json.loads(mock_users_and_content[1])[0]]}
+
+ranking_content = [
+    {"id": "1", "tags": [{"type": "country", "value": "USA", "threshold": 0.9}], "priority": 5},
+    {"id": "2", "tags": [{"type": "country", "value": "USA", "threshold": 0.6}, {"type": "topic", "value": "AI", "threshold": 0.7}]},
+    {"id": "3", "tags": [{"type": "country", "value": "USA", "threshold": 0.9}], "priority": 1},
+    {"id": "4", "tags": [{"type": "country", "value": "USA", "threshold": 0.2}, {"type": "topic", "value": "AI", "threshold": 0.9}]},
+    {"id": "5", "tags": [{"type": "topic", "value": "AI", "threshold": 0.9}]},
+    {"id": "6", "tags": [{"type": "country", "value": "Canada", "threshold": 1.0}]}
+]
+ranking_user = {"name": "Alice", "interests": [
+    {"type": "country", "value": "USA", "threshold": 0.5},
+    {"type": "topic", "value": "AI", "threshold": 0.5}
+]}
+
+def test_rank_content_orders_by_matches_thresholds_and_priority():
+    ranked = list(rank_content(ranking_user["interests"], ranking_content, build_tag_index(ranking_content), top_n=10))
+
+    # Item 4's country tag is below the interest threshold: it still matches,
+    # but ranks after item 2 whose tags both reach their thresholds
+    assert [item["id"] for item, _ in ranked] == ["2", "4", "1", "3", "5"]
+    assert [score for _, score in ranked][:3] == [(2, 2, 1.3, 0), (2, 1, 1.1, 0), (1, 1, 0.9, 5)]
+
+def test_rank_content_keeps_top_n_and_content_order_on_ties():
+    content = [{"id": str(i), "tags": [{"type": "country", "value": "USA"}]} for i in range(10)]
+
+    ranked = rank_content(ranking_user["interests"], content, build_tag_index(content), top_n=3)
+
+    assert [item["id"] for item, _ in ranked] == ["0", "1", "2"]
+
+def test_rank_content_require_country():
+    ranked = rank_content(ranking_user["interests"], ranking_content, build_tag_index(ranking_content), top_n=10, require_country=True)
+
+    assert [item["id"] for item, _ in ranked] == ["2", "4"]
+
+def test_rank_all_users():
+    result = rank_all_users([ranking_user], iter(ranking_content), top_n=2)
+
+    assert [item["id"] for item, _ in result["Alice"]] == ["2", "4"]
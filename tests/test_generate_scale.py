@@ -0,0 +1,48 @@
+import json
+from collections import Counter
+
+from generate_synth_data.generate_content_hf import COUNTRIES
+from generate_synth_data.generate_scale import iter_content, iter_users, write_json_array
+from helper_functions.helper_functions import iter_json_array, match_country_and_content
+
+def test_same_seed_same_records():
+    assert list(iter_content(50, seed=7)) == list(iter_content(50, seed=7))
+    assert list(iter_users(50, seed=7)) != list(iter_users(50, seed=8))
+
+def test_content_schema():
+    items = list(iter_content(100, tags_per_item=(2, 2), text_words=(5, 5)))
+
+    assert [item["id"] for item in items[:3]] == ["1", "2", "3"]
+    for item in items:
+        assert [tag["type"] for tag in item["tags"][:2]] == ["interest", "country"]
+        assert len(item["tags"]) == 4
+        assert all(0.1 <= tag["threshold"] <= 1 for tag in item["tags"])
+        assert item["tags"][1]["value"] in COUNTRIES
+
+def test_users_schema():
+    users = list(iter_users(100, interests_per_user=(1, 4)))
+
+    assert len({user["name"] for user in users}) == 100
+    for user in users:
+        assert user["interests"][0]["type"] == "country"
+        assert 2 <= len(user["interests"]) <= 5
+
+def test_skew_concentrates_popularity():
+    def top_country_share(skew):
+        counts = Counter(user["interests"][0]["value"] for user in iter_users(5000, skew=skew))
+        return counts.most_common(1)[0][1] / 5000
+
+    assert top_country_share(2.0) > 0.5
+    assert top_country_share(0.0) < 0.25
+
+def test_streamed_file_is_loadable_and_matchable(tmp_path):
+    content_path = tmp_path / "content.json"
+    users_path = tmp_path / "users.json"
+
+    assert write_json_array(iter_content(200), str(content_path)) == 200
+    write_json_array(iter_users(20), str(users_path))
+
+    content = json.loads(content_path.read_text())
+    assert list(iter_json_array(str(content_path))) == content
+    matches = match_country_and_content(list(iter_json_array(str(users_path))), content)
+    assert any(matches.values())
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from generate_synth_data import generate_content_hf, generate_users_hf
+from generate_synth_data.generate_shards import generate_sharded, merge_shards, run_shard, shard_path, shard_range
+
+def fake_pipeline(prompts, **kwargs):
+    return [[{"generated_text": f"{prompt}Generated text for {prompt}. More text."}] for prompt in prompts]
+
+@pytest.fixture(autouse=True)
+def fake_generators(monkeypatch):
+    calls = []
+
+    def generator(prompts, **kwargs):
+        calls.append(list(prompts))
+        return fake_pipeline(prompts, **kwargs)
+
+    monkeypatch.setattr(generate_content_hf, "generator", generator)
+    monkeypatch.setattr(generate_users_hf, "generator", generator)
+    return calls
+
+def test_shard_ranges_cover_all_records():
+    ranges = [shard_range(shard, 3, 10) for shard in range(3)]
+
+    assert ranges == [(0, 3), (3, 3), (6, 4)]
+
+def test_prompts_are_batched(tmp_path, fake_generators):
+    generate_sharded("content", 10, str(tmp_path / "content.json"), shard_count=1, batch_size=4, shard_dir=str(tmp_path))
+
+    assert [len(prompts) for prompts in fake_generators] == [4, 4, 2]
+
+def test_merged_content_matches_schema_and_format(tmp_path):
+    output = tmp_path / "content.json"
+
+    generate_sharded("content", 5, str(output), shard_count=2, batch_size=2, shard_dir=str(tmp_path / "shards"))
+
+    content = json.loads(output.read_text())
+    assert [item["id"] for item in content] == ["1", "2", "3", "4", "5"]
+    assert [tag["type"] for tag in content[0]["tags"]] == ["interest", "country"]
+    assert content[0]["content"].startswith("Generated text")
+    assert output.read_text() == json.dumps(content, indent=4)
+
+def test_output_does_not_depend_on_shard_count(tmp_path):
+    # Batches are seeded by the index of their first record, so runs whose
+    # shards start on the same batch boundaries produce the same records
+    generate_sharded("users", 8, str(tmp_path / "a.json"), shard_count=2, batch_size=2, shard_dir=str(tmp_path / "a"))
+    generate_sharded("users", 8, str(tmp_path / "b.json"), shard_count=4, batch_size=2, shard_dir=str(tmp_path / "b"))
+
+    assert (tmp_path / "a.json").read_text() == (tmp_path / "b.json").read_text()
+    assert len(json.loads((tmp_path / "a.json").read_text())) == 8
+
+def test_interrupted_shard_resumes(tmp_path, fake_generators):
+    generate_sharded("content", 6, str(tmp_path / "expected.json"), shard_count=1, batch_size=2, shard_dir=str(tmp_path / "full"))
+    shard_dir = tmp_path / "partial"
+    shard_dir.mkdir()
+    expected_lines = (tmp_path / "full" / "content-00000-of-00001.jsonl").read_text().splitlines(keepends=True)
+    # One complete batch, one record of the second and part of another
+    (shard_dir / "content-00000-of-00001.jsonl").write_text("".join(expected_lines[:3]) + expected_lines[3][:10])
+    fake_generators.clear()
+
+    generated = run_shard("content", 0, 1, 6, 42, 2, str(shard_dir))
+    merge_shards("content", 1, str(shard_dir), str(tmp_path / "resumed.json"))
+
+    assert generated == 4
+    assert len(fake_generators) == 2
+    assert (tmp_path / "resumed.json").read_text() == (tmp_path / "expected.json").read_text()
+    assert shard_path(str(shard_dir), "content", 0, 1).endswith("content-00000-of-00001.jsonl")
+
+def test_finished_shard_with_short_last_batch_is_not_regenerated(tmp_path, fake_generators):
+    generate_sharded("content", 10, str(tmp_path / "content.json"), shard_count=1, batch_size=4, shard_dir=str(tmp_path))
+    fake_generators.clear()
+
+    generated = run_shard("content", 0, 1, 10, 42, 4, str(tmp_path))
+
+    assert generated == 0
+    assert fake_generators == []
+    assert len((tmp_path / "content-00000-of-00001.jsonl").read_text().splitlines()) == 10
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from helper_functions.ingest_pipeline import Pipeline
+
+def test_batches_flow_through_stages_in_order():
+    received = []
+
+    stats = Pipeline(queue_size=2).run(
+        ([i, i] for i in range(5)),
+        [("double", lambda batch: [value * 2 for value in batch]), ("collect", received.append)],
+        source_name="parse"
+    )
+
+    assert received == [[0, 0], [2, 2], [4, 4], [6, 6], [8, 8]]
+    assert [(stage["stage"], stage["batches"], stage["items"]) for stage in stats] == [
+        ("parse", 5, 10), ("double", 5, 10), ("collect", 5, 10)
+    ]
+
+def test_bounded_queues_apply_backpressure():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield [i]
+
+    def slow_sink(batch):
+        release.wait()
+
+    runner = threading.Thread(target=Pipeline(queue_size=2).run, args=(source(), [("sink", slow_sink)]))
+    runner.start()
+    time.sleep(0.2)
+    # One batch in the sink, two queued, one waiting to be put
+    assert len(produced) <= 4
+    release.set()
+    runner.join()
+    assert len(produced) == 20
+
+def test_stages_overlap():
+    def slow(batch):
+        time.sleep(0.05)
+        return batch
+
+    started = time.perf_counter()
+    Pipeline(queue_size=2).run(([i] for i in range(6)), [("first", slow), ("second", slow)])
+
+    # Sequential stages would take 12 * 0.05s
+    assert time.perf_counter() - started < 0.5
+
+def test_stage_error_is_raised():
+    def failing(batch):
+        raise RuntimeError("encode failed")
+
+    with pytest.raises(RuntimeError, match="encode failed"):
+        Pipeline(queue_size=1).run(([i] for i in range(100)), [("embed", failing), ("upsert", lambda batch: None)])
@@ -0,0 +1,107 @@
+import json
+import logging
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from helper_functions import instrumentation
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    yield
+    instrumentation.enable(False)
+
+def test_disabled_is_a_no_op():
+    instrumentation.enable(False)
+    function = instrumentation.timed("function")(lambda: 1)
+
+    with instrumentation.collect() as records:
+        with instrumentation.span("stage") as stage:
+            stage.set(items=3)
+        instrumentation.count("hits")
+        assert function() == 1
+
+    assert stage is instrumentation.NOOP_SPAN
+    assert records == []
+
+def test_enable_applies_to_functions_decorated_before():
+    instrumentation.enable(False)
+
+    @instrumentation.timed("work")
+    def work():
+        return 42
+
+    instrumentation.enable()
+    try:
+        with instrumentation.collect() as records:
+            assert work() == 42
+    finally:
+        instrumentation.enable(False)
+
+    assert [record["name"] for record in records] == ["work"]
+
+def test_pipeline_threads_report_to_the_caller(enabled):
+    from helper_functions.ingest_pipeline import Pipeline
+
+    def embed(batch):
+        instrumentation.count("embedded", len(batch))
+        return batch
+
+    with instrumentation.collect() as records:
+        Pipeline().run([[1, 2], [3]], [("embed", embed)])
+    worker = threading.Thread(target=instrumentation.count, args=("outside",))
+    with instrumentation.collect() as outside:
+        worker.start()
+        worker.join()
+
+    assert instrumentation.summarize(records)["embedded"]["count"] == 3
+    # Threads not started through propagate() keep their own collectors
+    assert outside == []
+
+def test_spans_and_counters_are_collected_and_logged(enabled):
+    @instrumentation.timed("work")
+    def work():
+        return 42
+    handler = MagicMock(level=logging.NOTSET)
+    instrumentation.logger.addHandler(handler)
+
+    with instrumentation.collect() as records:
+        with instrumentation.span("model.encode", texts=2) as stage:
+            stage.set(dimension=384)
+        assert work() == 42
+        instrumentation.count("cache.hits", 5)
+
+    assert [(record["type"], record["name"]) for record in records] == [
+        ("span", "model.encode"), ("span", "work"), ("counter", "cache.hits")
+    ]
+    assert records[0]["texts"] == 2 and records[0]["dimension"] == 384
+    instrumentation.logger.removeHandler(handler)
+    logged = [json.loads(call.args[0].getMessage()) for call in handler.handle.call_args_list]
+    assert logged == records
+
+def test_span_records_errors(enabled):
+    with instrumentation.collect() as records:
+        with pytest.raises(ValueError):
+            with instrumentation.span("collection.query"):
+                raise ValueError("boom")
+
+    assert records[0]["error"] == "ValueError"
+
+def test_summarize_and_render_sidebar():
+    records = [
+        {"type": "span", "name": "collection.query", "duration_ms": 2.0},
+        {"type": "span", "name": "collection.query", "duration_ms": 3.0},
+        {"type": "span", "name": "model.encode", "duration_ms": 10.0},
+        {"type": "counter", "name": "cache.hits", "value": 4}
+    ]
+    st = MagicMock()
+
+    summary = instrumentation.summarize(records)
+    instrumentation.render_sidebar(st, records)
+
+    assert summary["collection.query"] == {"calls": 2, "total_ms": 5.0, "count": 0}
+    assert summary["cache.hits"]["count"] == 4
+    rows = st.sidebar.table.call_args.args[0]
+    assert [row["stage"] for row in rows] == ["model.encode", "collection.query", "cache.hits"]
@@ -0,0 +1,42 @@
+import pytest
+
+from helper_functions.helper_functions import match_country_content, match_country_and_content
+from helper_functions.parallel_matching import iter_shards, parallel_match_content
+
+countries = ["Japan", "Italy", "Brazil"]
+content = [
+    {"id": str(i), "tags": [{"type": "country", "value": countries[i % 3]}, {"type": "travel", "value": f"t{i % 4}"}]}
+    for i in range(40)
+]
+users = [
+    {"name": f"user{i}", "interests": [
+        {"type": "country", "value": countries[i % 3], "threshold": 0.5},
+        {"type": "travel", "value": f"t{i % 5}", "threshold": 0.5}
+    ]}
+    for i in range(25)
+]
+
+def test_iter_shards():
+    assert [len(shard) for shard in iter_shards(iter(users), 10)] == [10, 10, 5]
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_parallel_matches_serial(workers):
+    expected = match_country_content(users, content)
+
+    result = parallel_match_content(iter(users), content, workers=workers, chunk_size=4)
+
+    assert result == expected
+    assert list(result) == list(expected)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_require_country_matches_serial(workers):
+    expected = match_country_and_content(users, content)
+
+    assert parallel_match_content(users, content, require_country=True, workers=workers, chunk_size=7) == expected
+
+def test_single_worker_leaves_no_worker_index():
+    from helper_functions import parallel_matching
+
+    parallel_match_content(users, content, require_country=True, workers=1)
+
+    assert parallel_matching._worker_index is None
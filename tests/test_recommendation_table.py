@@ -0,0 +1,50 @@
+import pytest
+
+from helper_functions.recommendation_table import RecommendationTable, build_recommendation_table, write_recommendation_table
+
+user_recommendations = {
+    "Alice": {"ids": [["3", "1"]], "distances": [[0.1, 0.4]]},
+    "Bob Smith": {"ids": [["12"]], "distances": [[0.2]]}
+}
+
+def test_table_round_trip(tmp_path):
+    file_path = tmp_path / "table.bin"
+    write_recommendation_table(str(file_path), build_recommendation_table(user_recommendations, top_n=3))
+
+    table = RecommendationTable(str(file_path))
+
+    assert len(table) == 2 and table.top_n == 3
+    assert table.recommendations("Alice")["ids"] == [["3", "1"]]
+    assert table.recommendations("Alice")["distances"][0] == pytest.approx([0.1, 0.4])
+    assert table.recommendations("Alice", top_n=1)["ids"] == [["3"]]
+    assert table.recommendations("Bob Smith")["ids"] == [["12"]]
+    assert table.recommendations("Carol") is None
+
+def test_rewrite_replaces_table_atomically(tmp_path):
+    file_path = str(tmp_path / "tables" / "table.bin")
+    write_recommendation_table(file_path, build_recommendation_table(user_recommendations, top_n=2))
+    old_table = RecommendationTable(file_path)
+
+    write_recommendation_table(file_path, build_recommendation_table({"Carol": {"ids": [["7"]], "distances": [[0.3]]}}, top_n=2))
+
+    # Open readers keep the mapping of the file they opened
+    assert old_table.recommendations("Alice")["ids"] == [["3", "1"]]
+    assert RecommendationTable(file_path).recommendations("Carol")["ids"] == [["7"]]
+    assert sorted(path.name for path in (tmp_path / "tables").iterdir()) == ["table.bin"]
+
+def test_table_header_records_data_versions(tmp_path):
+    file_path = str(tmp_path / "table.bin")
+    write_recommendation_table(file_path, build_recommendation_table(user_recommendations, top_n=2), "corpus", "users")
+
+    table = RecommendationTable(file_path)
+
+    assert table.is_current("corpus", "users")
+    assert not table.is_current("corpus", "changed users")
+    assert not table.is_current("changed corpus", "users")
+    assert table.recommendations("Bob Smith")["ids"] == [["12"]]
+
+def test_empty_table(tmp_path):
+    file_path = str(tmp_path / "table.bin")
+    write_recommendation_table(file_path, build_recommendation_table({}, top_n=2))
+
+    assert len(RecommendationTable(file_path)) == 0
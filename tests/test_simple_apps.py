@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+mock_users = [
+    {
+        "name": "Alice",
+        "interests": [
+            {"type": "country", "value": "USA", "threshold": 0.5},
+            {"type": "interest", "value": "Technology", "threshold": 0.5}
+        ]
+    }
+]
+
+mock_content = [
+    {"id": "1", "title": "Low", "content": "a", "priority": 9, "tags": [
+        {"type": "country", "value": "USA", "threshold": 0.2},
+        {"type": "interest", "value": "Technology", "threshold": 0.1}
+    ]},
+    {"id": "2", "title": "High", "content": "b", "tags": [
+        {"type": "country", "value": "USA", "threshold": 0.9},
+        {"type": "interest", "value": "Technology", "threshold": 0.8}
+    ]},
+    {"id": "3", "title": "Mid", "content": "c", "tags": [
+        {"type": "country", "value": "USA", "threshold": 0.6},
+        {"type": "interest", "value": "Technology", "threshold": 0.3}
+    ]},
+    {"id": "4", "title": "Other", "content": "d", "tags": [{"type": "country", "value": "Canada", "threshold": 0.9}]}
+]
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    (tmp_path / "users.json").write_text(json.dumps(mock_users))
+    (tmp_path / "content.json").write_text(json.dumps(mock_content))
+    monkeypatch.chdir(tmp_path)
+    # The apps' matcher is a process-wide resource keyed by the relative paths
+    st.cache_resource.clear()
+    yield tmp_path
+    st.cache_resource.clear()
+
+def shown_titles(app):
+    app.run()
+    assert not app.exception
+    app.selectbox[1].set_value(max(app.selectbox[1].options, key=int)).run()
+    return [markdown.value.split("**")[1] for markdown in app.markdown if "**" in markdown.value]
+
+@pytest.mark.parametrize("script", ["simple_app_country.py", "simple_app_country_interest.py"])
+def test_tags_below_the_interest_threshold_are_still_shown(data_dir, script):
+    app = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=30)
+
+    # Tags below Alice's thresholds still match: "Low" (no tag reaches them)
+    # and "Mid" (one does) are shown, ranked after "High" despite priority
+    assert shown_titles(app) == ["High", "Mid", "Low"]
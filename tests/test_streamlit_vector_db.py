@@ -1,18 +1,45 @@
 import pytest
 import json
+import os
+import subprocess
+import sys
 import numpy as np
 from unittest.mock import patch, MagicMock
-from sentence_transformers import SentenceTransformer
+
+from helper_functions.helper_functions import file_content_hash
+from helper_functions.vector_index import NumpyVectorIndex
 
 # Import the functions from the main module
+import streamlit_vector_db
 from streamlit_vector_db import (
     load_json,
+    prepare_metadata,
     prepare_content,
     add_content_to_collection,
+    content_hash,
+    sync_content_to_collection,
+    ingest_content,
+    get_collection,
+    corpus_fingerprint,
+    is_collection_current,
+    mark_collection_current,
     get_user_embedding,
+    get_user_embeddings,
     match_user_to_content,
+    match_users_to_content,
     process_all_users,
-    filter_recommendations
+    filter_recommendations,
+    get_model,
+    set_model,
+    tag_metadata,
+    build_interest_filter,
+    index_metadata,
+    precompute_recommendations,
+    load_recommendation_table,
+    recommendation_table_version,
+    lookup_recommendations,
+    query_interest_types,
+    build_content_index
 )
 
 # Mock data
@@ -28,12 +55,19 @@ mock_user_data = [
 
 mock_embeddings = np.array([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
 
+@pytest.fixture(autouse=True)
+def clear_interest_cache():
+    # The interest cache is process-wide; start every test with it empty
+    streamlit_vector_db.interest_embedding_cache.clear()
+    yield
+
 @pytest.fixture
 def mock_model():
-    with patch('streamlit_vector_db.SentenceTransformer') as mock_model:
-        instance = mock_model.return_value
-        instance.encode.return_value = mock_embeddings
-        yield instance
+    instance = MagicMock()
+    instance.encode.return_value = mock_embeddings
+    set_model(instance)
+    yield instance
+    set_model(None)
 
 def test_load_json(tmp_path):
     # Create a temporary JSON file
@@ -45,6 +79,35 @@ def test_load_json(tmp_path):
     # Test load_json function
     assert load_json(file_path) == data
 
+def test_load_json_stream(tmp_path):
+    file_path = tmp_path / "data.json"
+    with open(file_path, 'w') as file:
+        json.dump(mock_user_data, file)
+
+    records = load_json(file_path, stream=True)
+
+    assert not isinstance(records, list)
+    assert list(records) == mock_user_data
+
+def test_load_json_binary_dataset(tmp_path):
+    from helper_functions.binary_dataset import convert_json
+
+    content = [{"id": "1", "content": "Sample content 1", "tags": [{"type": "topic", "value": "tag1"}], "category": "news"}]
+    json_path = tmp_path / "content.json"
+    json_path.write_text(json.dumps(content))
+    binary_path = str(tmp_path / "content.cbin")
+    convert_json(str(json_path), binary_path)
+
+    assert [dict(item) for item in load_json(binary_path)] == content
+    assert [dict(item) for item in load_json(binary_path, stream=True)] == content
+
+def test_prepare_content_from_generator(mock_model):
+    content_ids, content_full_texts, content_embeddings, metadata = prepare_content(item for item in mock_content_data)
+
+    assert content_ids == ["1", "2"]
+    assert content_full_texts == ["Sample content 1", "Sample content 2"]
+    assert len(metadata) == 2
+
 def test_prepare_content(mock_model):
     content_ids, content_full_texts, content_embeddings, metadata = prepare_content(mock_content_data)
     
@@ -56,6 +119,16 @@ def test_prepare_content(mock_model):
         {"id": "2", "category": "sports", "interests": "tag2"}
     ]
 
+def test_prepare_content_with_embedding_cache():
+    embedding_cache = MagicMock()
+    embedding_cache.encode.return_value = mock_embeddings
+
+    content_ids, content_full_texts, content_embeddings, metadata = prepare_content(mock_content_data, embedding_cache)
+
+    embedding_cache.encode.assert_called_once()
+    assert embedding_cache.encode.call_args.args[0] == ["Sample content 1", "Sample content 2"]
+    assert np.array_equal(content_embeddings, mock_embeddings)
+
 def test_add_content_to_collection():
     mock_collection = MagicMock()
     content_ids = ["1", "2"]
@@ -74,6 +147,154 @@ def test_add_content_to_collection():
         metadatas=metadata
     )
 
+def test_sync_content_to_collection():
+    metadata = [
+        {"id": "1", "category": "news", "interests": "tag1"},
+        {"id": "2", "category": "sports", "interests": "tag2"}
+    ]
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {
+        "ids": ["1", "2", "3"],
+        "metadatas": [
+            {"content_hash": content_hash("Sample content 1", metadata[0])},
+            {"content_hash": "stale"},
+            {"content_hash": "gone"}
+        ]
+    }
+
+    report = sync_content_to_collection(mock_collection, ["1", "2"], ["Sample content 1", "Sample content 2"], mock_embeddings, metadata)
+
+    assert report == {"added": 0, "updated": 1, "skipped": 1, "removed": 1}
+    mock_collection.upsert.assert_called_once()
+    assert mock_collection.upsert.call_args.kwargs["ids"] == ["2"]
+    assert mock_collection.upsert.call_args.kwargs["embeddings"] == [mock_embeddings[1].tolist()]
+    mock_collection.delete.assert_called_once_with(ids=["3"])
+
+def test_sync_content_to_collection_reembeds_after_model_change():
+    metadata = [{"id": "1"}, {"id": "2"}]
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {
+        "ids": ["1", "2"],
+        "metadatas": [{"content_hash": content_hash(doc, meta, "old-model")} for doc, meta in zip(["a", "b"], metadata)]
+    }
+
+    unchanged = sync_content_to_collection(mock_collection, ["1", "2"], ["a", "b"], mock_embeddings, metadata, model_name="old-model")
+    switched = sync_content_to_collection(mock_collection, ["1", "2"], ["a", "b"], mock_embeddings, metadata, model_name="new-model")
+
+    assert unchanged == {"added": 0, "updated": 0, "skipped": 2, "removed": 0}
+    assert switched == {"added": 0, "updated": 2, "skipped": 0, "removed": 0}
+    assert mock_collection.upsert.call_args.kwargs["ids"] == ["1", "2"]
+
+def test_sync_content_to_collection_batches_new_content():
+    mock_collection = MagicMock()
+    mock_collection.get.return_value = {"ids": [], "metadatas": []}
+    metadata = [{"id": "1"}, {"id": "2"}]
+
+    report = sync_content_to_collection(mock_collection, ["1", "2"], ["a", "b"], mock_embeddings, metadata, batch_size=1)
+
+    assert report == {"added": 2, "updated": 0, "skipped": 0, "removed": 0}
+    assert mock_collection.upsert.call_count == 2
+    mock_collection.delete.assert_not_called()
+
+def test_ingest_content_streams_changed_content(mock_model, tmp_path):
+    content_file = tmp_path / "content.json"
+    content_file.write_text(json.dumps(mock_content_data + [{"id": "3", "content": "Sample content 3"}]))
+    _, _, metadata = prepare_metadata(mock_content_data)
+    mock_model.encode.side_effect = lambda texts: np.ones((len(texts), 3))
+    mock_collection = MagicMock()
+    mock_collection.get.side_effect = [
+        {"ids": ["1"], "metadatas": [{"content_hash": content_hash("Sample content 1", metadata[0])}]},
+        {"ids": ["4"], "metadatas": [{"content_hash": "gone"}]},
+        {"ids": [], "metadatas": []}
+    ]
+
+    report, ingested_metadata = ingest_content(mock_collection, str(content_file), batch_size=1)
+
+    assert {key: report[key] for key in ("added", "updated", "skipped", "removed")} == {"added": 2, "updated": 0, "skipped": 1, "removed": 1}
+    assert [stage["stage"] for stage in report["stages"]] == ["parse", "embed", "upsert"]
+    assert [stage["items"] for stage in report["stages"]] == [2, 2, 2]
+    # The unchanged document is never embedded
+    assert [call.args[0] for call in mock_model.encode.call_args_list] == [["Sample content 2"], ["Sample content 3"]]
+    assert [call.kwargs["ids"] for call in mock_collection.upsert.call_args_list] == [["2"], ["3"]]
+    assert [meta["id"] for meta in ingested_metadata] == ["1", "2", "3"]
+    mock_collection.delete.assert_called_once_with(ids=["4"])
+
+@patch('streamlit_vector_db.model')
+def test_prepare_metadata_does_not_encode(mock_model):
+    content_ids, content_full_texts, metadata = prepare_metadata(mock_content_data)
+
+    assert content_ids == ["1", "2"]
+    assert content_full_texts == ["Sample content 1", "Sample content 2"]
+    assert metadata[1] == {"id": "2", "category": "sports", "interests": "tag2"}
+    mock_model.encode.assert_not_called()
+
+def test_get_collection_is_persistent(tmp_path):
+    mock_chromadb = MagicMock()
+    with patch.dict(sys.modules, {"chromadb": mock_chromadb}):
+        collection = get_collection(str(tmp_path), "test_collection")
+
+    mock_chromadb.PersistentClient.assert_called_once_with(path=str(tmp_path))
+    mock_chromadb.PersistentClient.return_value.get_or_create_collection.assert_called_once_with("test_collection")
+    assert collection == mock_chromadb.PersistentClient.return_value.get_or_create_collection.return_value
+
+def test_corpus_fingerprint_tracks_file_and_model(tmp_path):
+    file_path = tmp_path / "content.json"
+    file_path.write_text(json.dumps(mock_content_data))
+    fingerprint = corpus_fingerprint(file_path, "model-a")
+
+    assert corpus_fingerprint(file_path, "model-a") == fingerprint
+    assert corpus_fingerprint(file_path, "model-b") != fingerprint
+    file_path.write_text(json.dumps(mock_content_data[:1]))
+    assert corpus_fingerprint(file_path, "model-a") != fingerprint
+
+def test_collection_warm_start_detection():
+    mock_collection = MagicMock()
+    mock_collection.metadata = {"hnsw:space": "l2"}
+    mock_collection.count.return_value = 2
+
+    assert not is_collection_current(mock_collection, "abc")
+    mark_collection_current(mock_collection, "abc")
+    mock_collection.modify.assert_called_once_with(metadata={"corpus_fingerprint": "abc"})
+
+    mock_collection.metadata = {"corpus_fingerprint": "abc"}
+    assert is_collection_current(mock_collection, "abc")
+    mock_collection.count.return_value = 0
+    assert not is_collection_current(mock_collection, "abc")
+
+@patch('streamlit_vector_db.load_content_store')
+@patch('streamlit_vector_db.get_collection')
+def test_build_content_index_warm_start_does_not_read_content(mock_get_collection, mock_load_content_store, tmp_path):
+    mock_collection = MagicMock()
+    mock_collection.metadata = {"corpus_fingerprint": "abc"}
+    mock_collection.count.return_value = 2
+    mock_collection.get.return_value = {
+        "ids": ["1", "2"],
+        "metadatas": [
+            {"id": "1", "category": "news", "interests": "tag1", "content_hash": "h1"},
+            {"id": "2", "category": "sports", "interests": "tag2", "content_hash": "h2"}
+        ]
+    }
+    mock_get_collection.return_value = mock_collection
+
+    collection, metadata_by_id = build_content_index(str(tmp_path / "missing.json"), "abc", backend="chroma")
+
+    mock_load_content_store.assert_not_called()
+    assert collection is mock_collection
+    assert metadata_by_id["2"] == {"id": "2", "category": "sports", "interests": "tag2"}
+
+@patch('streamlit_vector_db.ingest_content')
+@patch('streamlit_vector_db.get_collection')
+def test_build_content_index_logs_sync_report(mock_get_collection, mock_ingest_content, caplog, capsys, tmp_path):
+    mock_collection = MagicMock()
+    mock_collection.metadata = {}
+    mock_get_collection.return_value = mock_collection
+    mock_ingest_content.return_value = ({"added": 1}, [{"id": "1"}])
+
+    with caplog.at_level("INFO", logger="streamlit_vector_db"):
+        build_content_index(str(tmp_path / "content.json"), "abc", backend="chroma")
+
+    assert "Content sync: {'added': 1}" in caplog.text
+    assert capsys.readouterr().out == ""
 
 def test_match_user_to_content(mock_model):
     mock_collection = MagicMock()
@@ -84,20 +305,89 @@ def test_match_user_to_content(mock_model):
     
     assert results == {"documents": [["doc1"]], "distances": [[0.1]], "ids": [["1"]]}
 
+@patch('streamlit_vector_db.model')
+def test_get_user_embedding_reuses_interest_embeddings(mock_model):
+    mock_model.encode.side_effect = lambda values: np.array([[float(len(value)), 1.0] for value in values])
+
+    first = get_user_embedding([{"value": "ab"}, {"value": "abcd"}])
+    users = get_user_embeddings([[{"value": "abcd"}], [{"value": "ab"}, {"value": "abcdef"}]])
+
+    assert np.allclose(first, [3.0, 1.0])
+    assert np.allclose(users, [[4.0, 1.0], [4.0, 1.0]])
+    # Only the value not seen before reaches the model the second time
+    assert mock_model.encode.call_args_list[1].args[0] == ["abcdef"]
+
+@patch('streamlit_vector_db.model')
+def test_get_user_embedding_with_user_store(mock_model):
+    mock_model.encode.return_value = np.array([[1.0, 2.0]])
+    user_store = MagicMock()
+    user_store.embedding.return_value = np.array([0.5, 0.5])
+
+    embedding = get_user_embedding([{"value": "tag1"}], "user1", user_store)
+
+    assert np.array_equal(embedding, [0.5, 0.5])
+    assert user_store.embedding.call_args.args[:2] == ("user1", ["tag1"])
+
+@patch('streamlit_vector_db.model')
 @patch('streamlit_vector_db.load_json')
-@patch('streamlit_vector_db.match_user_to_content')
-def test_process_all_users(mock_match_user_to_content, mock_load_json):
+def test_process_all_users(mock_load_json, mock_model):
     mock_load_json.return_value = mock_user_data
-    mock_match_user_to_content.return_value = {"documents": [["doc1"]], "distances": [[0.1]], "ids": [["1"]]}
+    mock_model.encode.return_value = mock_embeddings
     
     mock_collection = MagicMock()
+    mock_collection.query.return_value = {"documents": [["doc1"], ["doc2"]], "distances": [[0.1], [0.2]], "ids": [["1"], ["2"]]}
     user_recommendations = process_all_users(mock_collection, "dummy_path", top_n=1)
     
     expected_recommendations = {
         "user1": {"documents": [["doc1"]], "distances": [[0.1]], "ids": [["1"]]},
-        "user2": {"documents": [["doc1"]], "distances": [[0.1]], "ids": [["1"]]}
+        "user2": {"documents": [["doc2"]], "distances": [[0.2]], "ids": [["2"]]}
     }
     assert user_recommendations == expected_recommendations
+    # All interests are encoded at once and both users share one query
+    mock_model.encode.assert_called_once_with(["tag1", "tag2"])
+    mock_collection.query.assert_called_once_with(query_embeddings=mock_embeddings.tolist(), n_results=1)
+
+@patch('streamlit_vector_db.model')
+def test_match_users_to_content_chunks_queries(mock_model):
+    mock_model.encode.return_value = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    users = [
+        {"name": "user1", "interests": [{"value": "a"}, {"value": "b"}]},
+        {"name": "user2", "interests": [{"value": "c"}]}
+    ]
+    mock_collection = MagicMock()
+    mock_collection.query.side_effect = [
+        {"ids": [["1"]], "distances": [[0.1]], "documents": [["doc1"]], "embeddings": None},
+        {"ids": [["2"]], "distances": [[0.2]], "documents": [["doc2"]], "embeddings": None}
+    ]
+
+    user_recommendations = match_users_to_content(mock_collection, users, top_n=1, query_batch_size=1)
+
+    assert mock_collection.query.call_count == 2
+    assert mock_collection.query.call_args_list[0].kwargs["query_embeddings"] == [[0.5, 0.5]]
+    assert user_recommendations["user2"] == {"ids": [["2"]], "distances": [[0.2]], "documents": [["doc2"]], "embeddings": None}
+
+@patch('streamlit_vector_db.model')
+def test_match_users_to_content_consumes_users_lazily(mock_model):
+    mock_model.encode.side_effect = lambda values: np.ones((len(values), 2))
+    consumed = []
+
+    def users():
+        for number in range(5):
+            consumed.append(number)
+            yield {"name": f"user{number}", "interests": [{"value": f"value{number}"}]}
+
+    def query(query_embeddings, n_results):
+        # Only the users of the chunks queried so far have been read
+        assert len(consumed) == min(2 * mock_collection.query.call_count, 5)
+        return {"ids": [["1"]] * len(query_embeddings), "distances": [[0.1]] * len(query_embeddings)}
+
+    mock_collection = MagicMock()
+    mock_collection.query.side_effect = query
+
+    user_recommendations = match_users_to_content(mock_collection, users(), top_n=1, query_batch_size=2)
+
+    assert mock_collection.query.call_count == 3
+    assert list(user_recommendations) == [f"user{number}" for number in range(5)]
 
 def test_filter_recommendations():
     recommendations = {
@@ -116,3 +406,160 @@ def test_filter_recommendations():
     expected_docs = [(1, "1", "doc1", 0.9, "tag1"), (2, "2", "doc2", 0.8, "tag2")]
     
     assert filtered_docs == expected_docs
+
+
+def test_tag_metadata_is_structured():
+    tags = [
+        {"type": "interest", "value": "travel", "threshold": 0.7},
+        {"type": "country", "value": "Japan", "threshold": 0.3}
+    ]
+
+    assert tag_metadata(tags) == {
+        "tag_interest": "travel",
+        "tag_country": "Japan",
+        "type_travel": True,
+        "type_country": True
+    }
+
+def test_build_interest_filter():
+    assert build_interest_filter([]) is None
+    assert build_interest_filter(["country"]) == {"type_country": True}
+    assert build_interest_filter(["country", "movies", "country"]) == {
+        "$or": [{"type_country": True}, {"type_movies": True}]
+    }
+
+@patch('streamlit_vector_db.model')
+def test_match_user_to_content_pushes_filter_into_query(mock_model):
+    mock_model.encode.return_value = mock_embeddings
+    mock_collection = MagicMock()
+
+    match_user_to_content(mock_collection, "user1", mock_user_data[0]["interests"], top_n=2, interest_types=["country"])
+    empty = match_user_to_content(mock_collection, "user1", mock_user_data[0]["interests"], top_n=2, interest_types=[])
+
+    assert mock_collection.query.call_count == 1
+    assert mock_collection.query.call_args.kwargs["where"] == {"type_country": True}
+    assert empty["ids"] == [[]]
+
+def test_filter_recommendations_with_metadata_index():
+    recommendations = {
+        "documents": [["doc2"]],
+        "distances": [[0.25]],
+        "ids": [["2"]]
+    }
+    metadata = index_metadata([
+        {"id": "1", "category": "news", "interests": "tag1"},
+        {"id": "2", "category": "sports", "interests": "tag2"}
+    ])
+
+    filtered_docs = filter_recommendations(recommendations, mock_user_data[1]["interests"], ["tag"], metadata)
+
+    assert filtered_docs == [(1, "2", "doc2", 0.75, "tag2")]
+
+def test_import_does_not_load_heavy_dependencies():
+    code = (
+        "import sys, streamlit_vector_db; "
+        "print(sorted(m for m in ('sentence_transformers', 'chromadb', 'streamlit', 'torch') if m in sys.modules))"
+    )
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=repo_root).stdout
+
+    assert output.strip() == "[]"
+
+@patch('streamlit_vector_db.load_model')
+def test_get_model_loads_once_on_first_use(mock_load_model):
+    set_model(None)
+
+    first = get_model()
+    second = get_model()
+
+    mock_load_model.assert_called_once_with()
+    assert first is second is mock_load_model.return_value
+    set_model(None)
+
+@patch('streamlit_vector_db.model')
+def test_match_user_to_content_with_numpy_backend(mock_model):
+    mock_model.encode.return_value = np.array([[0.4, 0.5, 0.6]])
+    content_ids, content_full_texts, metadata = prepare_metadata(mock_content_data)
+    backend = NumpyVectorIndex(content_ids, content_full_texts, mock_embeddings, metadata)
+
+    recommendations = match_user_to_content(backend, "user1", mock_user_data[0]["interests"], top_n=1)
+    filtered_docs = filter_recommendations(recommendations, mock_user_data[0]["interests"], ["tag"], index_metadata(metadata))
+
+    assert recommendations["ids"] == [["2"]]
+    assert [doc[:3] for doc in filtered_docs] == [(1, "2", "Sample content 2")]
+
+@patch('streamlit_vector_db.model')
+@patch('streamlit_vector_db.load_json')
+def test_precomputed_recommendations_are_served_from_table(mock_load_json, mock_model, tmp_path):
+    mock_load_json.return_value = iter(mock_user_data)
+    mock_model.encode.side_effect = lambda texts: np.array([[0.1, 0.2, 0.3] if text == "tag1" else [0.4, 0.5, 0.6] for text in texts])
+    content_ids, content_full_texts, metadata = prepare_metadata(mock_content_data)
+    backend = NumpyVectorIndex(content_ids, content_full_texts, mock_embeddings, metadata)
+    table_path = str(tmp_path / "table.bin")
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps(mock_user_data))
+    users_hash = file_content_hash(str(users_path))
+
+    assert precompute_recommendations(backend, str(users_path), table_path, top_n=2, fingerprint="corpus") == 2
+    table = load_recommendation_table(table_path, recommendation_table_version(table_path))
+    recommendations = lookup_recommendations(table, backend, "user2", 1, "corpus", users_hash)
+
+    assert recommendations["ids"] == [["2"]]
+    assert recommendations["documents"] == [["Sample content 2"]]
+    # Requests the table cannot answer fall back to a live query
+    assert lookup_recommendations(table, backend, "user3", 1, "corpus", users_hash) is None
+    assert lookup_recommendations(table, backend, "user2", 3, "corpus", users_hash) is None
+    assert load_recommendation_table(str(tmp_path / "missing.bin"), recommendation_table_version(str(tmp_path / "missing.bin"))) is None
+
+@patch('streamlit_vector_db.model')
+@patch('streamlit_vector_db.load_json')
+def test_stale_recommendation_table_falls_back_to_live_query(mock_load_json, mock_model, tmp_path):
+    mock_load_json.return_value = iter(mock_user_data)
+    mock_model.encode.side_effect = lambda texts: np.array([[0.1, 0.2, 0.3] if text == "tag1" else [0.4, 0.5, 0.6] for text in texts])
+    content_ids, content_full_texts, metadata = prepare_metadata(mock_content_data)
+    backend = NumpyVectorIndex(content_ids, content_full_texts, mock_embeddings, metadata)
+    table_path = str(tmp_path / "table.bin")
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps(mock_user_data))
+    users_hash = file_content_hash(str(users_path))
+    precompute_recommendations(backend, str(users_path), table_path, top_n=2, fingerprint="corpus")
+    table = load_recommendation_table(table_path, recommendation_table_version(table_path))
+
+    # Content or users changed since the precompute
+    assert lookup_recommendations(table, backend, "user2", 1, "other corpus", users_hash) is None
+    assert lookup_recommendations(table, backend, "user2", 1, "corpus", "other users") is None
+    # A recommended document was deleted from the collection
+    shrunk = NumpyVectorIndex(content_ids[:1], content_full_texts[:1], mock_embeddings[:1], metadata[:1])
+    assert lookup_recommendations(table, shrunk, "user2", 1, "corpus", users_hash) is None
+
+def test_query_interest_types():
+    assert query_interest_types(["country", "tag"], ["tag", "country"]) is None
+    assert query_interest_types(["country", "tag"], ["tag"]) == ["tag"]
+    assert query_interest_types(["country", "tag"], []) == []
+
+@patch('streamlit_vector_db.model')
+@patch('streamlit_vector_db.load_json')
+def test_table_hit_and_live_query_agree_on_unfiltered_view(mock_load_json, mock_model, tmp_path):
+    # The nearest document does not cover the user's only interest type
+    content = [
+        {"id": "1", "content": "Near", "tags": [{"type": "country", "value": "USA"}]},
+        {"id": "2", "content": "Far", "tags": [{"type": "tag", "value": "tag2"}]}
+    ]
+    mock_load_json.return_value = iter(mock_user_data[:1])
+    mock_model.encode.side_effect = lambda texts: np.array([[0.1, 0.2, 0.3]] * len(texts))
+    content_ids, content_full_texts, metadata = prepare_metadata(content)
+    backend = NumpyVectorIndex(content_ids, content_full_texts, mock_embeddings, metadata)
+    table_path = str(tmp_path / "table.bin")
+    users_path = tmp_path / "users.json"
+    users_path.write_text(json.dumps(mock_user_data[:1]))
+    precompute_recommendations(backend, str(users_path), table_path, top_n=2, fingerprint="corpus")
+    table = load_recommendation_table(table_path, recommendation_table_version(table_path))
+    interests = mock_user_data[0]["interests"]
+    query_types = query_interest_types([interest["type"] for interest in interests], ["tag"])
+
+    from_table = lookup_recommendations(table, backend, "user1", 2, "corpus", file_content_hash(str(users_path)))
+    live = match_user_to_content(backend, "user1", interests, top_n=2, interest_types=query_types)
+
+    assert from_table["ids"] == live["ids"] == [["1", "2"]]
+    assert from_table["documents"] == live["documents"]
+    assert np.allclose(from_table["distances"], live["distances"])
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from helper_functions.vector_index import (NumpyVectorIndex, QuantizedVectorIndex, evaluate_quantization,
+                                           normalize_rows, top_k)
+
+ids = ["1", "2", "3", "4"]
+documents = ["doc1", "doc2", "doc3", "doc4"]
+embeddings = np.array([
+    [1.0, 0.0, 0.0],
+    [0.0, 2.0, 0.0],
+    [0.0, 0.0, 1.0],
+    [1.0, 1.0, 0.0]
+])
+metadatas = [
+    {"id": "1", "type_country": True, "tag_country": "Japan"},
+    {"id": "2", "type_travel": True, "tag_country": "Italy"},
+    {"id": "3", "type_country": True, "type_travel": True, "tag_country": "Japan"},
+    {"id": "4", "tag_country": "Brazil"}
+]
+
+@pytest.fixture
+def index():
+    return NumpyVectorIndex(ids, documents, embeddings, metadatas)
+
+def test_top_k_returns_closest_first():
+    distances = np.array([[0.5, 0.1, 0.9, 0.3], [0.2, 0.8, 0.0, 0.4]])
+
+    assert top_k(distances, 2).tolist() == [[1, 3], [2, 0]]
+    assert top_k(distances, 10).tolist() == [[1, 3, 0, 2], [2, 0, 3, 1]]
+
+def test_query_matches_brute_force_l2(index):
+    query = np.array([0.6, 0.8, 0.1])
+
+    results = index.query(query_embeddings=[query.tolist()], n_results=2)
+
+    expected = np.sum((normalize_rows(embeddings) - query) ** 2, axis=1)
+    assert results["ids"] == [["4", "2"]]
+    assert np.allclose(results["distances"][0], np.sort(expected)[:2], atol=1e-6)
+    assert results["documents"] == [["doc4", "doc2"]]
+    assert results["metadatas"][0][0] is metadatas[3]
+
+def test_batch_query_returns_one_row_per_query(index):
+    results = index.query(query_embeddings=[[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], n_results=1)
+
+    assert results["ids"] == [["1"], ["3"]]
+
+def test_cosine_space():
+    index = NumpyVectorIndex(ids, documents, embeddings, metadatas, space="cosine")
+
+    results = index.query(query_embeddings=[[0.0, 5.0, 0.0]], n_results=1)
+
+    assert results["ids"] == [["2"]]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-6)
+
+def test_where_filter(index):
+    results = index.query(query_embeddings=[[1.0, 0.0, 0.0]], n_results=3,
+                          where={"$or": [{"type_travel": True}, {"tag_country": {"$in": ["Brazil"]}}]})
+
+    assert results["ids"] == [["4", "2", "3"]]
+    assert index.query(query_embeddings=[[1.0, 0.0, 0.0]], n_results=3, where={"type_country": True})["ids"] == [["1", "3"]]
+
+def test_unknown_space_is_rejected():
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(ids, documents, embeddings, space="manhattan")
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_quantized_index_reranks_to_exact_results(dtype):
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((500, 16)).astype(np.float32)
+    queries = rng.standard_normal((20, 16)).astype(np.float32)
+    corpus_ids = [str(i) for i in range(len(corpus))]
+    exact = NumpyVectorIndex(corpus_ids, corpus_ids, corpus)
+    quantized = QuantizedVectorIndex(corpus_ids, corpus_ids, corpus, dtype=dtype, rerank_factor=4)
+
+    report = evaluate_quantization(quantized, exact, queries, k=5)
+    results = quantized.query(query_embeddings=queries[:1], n_results=5)
+
+    assert report["recall@5"] == 1.0
+    assert report["bytes"] < report["reference_bytes"]
+    # Returned distances are the exact full-precision ones
+    assert np.allclose(results["distances"][0], exact.query(query_embeddings=queries[:1], n_results=5)["distances"][0], atol=1e-5)
+
+def test_quantized_index_reads_full_precision_rows_and_applies_where():
+    full_precision = MagicMock()
+    full_precision.__getitem__.side_effect = lambda positions: embeddings[positions]
+    index = QuantizedVectorIndex(ids, documents, embeddings, metadatas, full_precision=full_precision)
+
+    results = index.query(query_embeddings=[[1.0, 0.0, 0.0]], n_results=3, where={"type_country": True})
+
+    assert results["ids"] == [["1", "3"]]
+    assert full_precision.__getitem__.call_count == 1